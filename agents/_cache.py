@@ -0,0 +1,33 @@
+"""
+SQLite response cache for deterministic (temperature 0) Anaya AI model calls.
+
+The cache is attached only to the model instances that opt in via `get_cached_llm`; it is not installed
+globally, so sampled models (dialogue manager, wellness, reflection, STM, LTM) always call the API.
+The file holds full prompts, including user chat and profile text, so keep it out of version control.
+"""
+
+import os
+import functools
+
+from typing import TYPE_CHECKING
+
+from agents._llm import get_llm, load_env
+
+if TYPE_CHECKING:
+    from langchain_core.caches import BaseCache
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+
+@functools.cache
+def get_llm_cache() -> "BaseCache":
+    """Returns the shared SQLite cache, at ANAYA_LLM_CACHE_PATH (default .langchain.db)."""
+    from langchain_community.cache import SQLiteCache
+
+    load_env()
+    return SQLiteCache(database_path=os.getenv("ANAYA_LLM_CACHE_PATH", ".langchain.db"))
+
+
+@functools.cache
+def get_cached_llm(model: str) -> "BaseChatModel":
+    """Returns a temperature-0 instance of `model` whose responses are served from the SQLite cache."""
+    return get_llm(model, 0).model_copy(update={"cache": get_llm_cache()})
@@ -0,0 +1,123 @@
+"""
+Persistent semantic Q&A cache for the Factual Responder (cache-augmented generation).
+
+Questions are embedded with the knowledge-base embedding model and stored, with their
+answers, in a local Chroma collection. A new question whose nearest cached question is
+similar enough is answered from the cache instead of a fresh LLM call. Entries expire
+after a TTL so stale answers are eventually regenerated; expired entries are swept and
+the collection is capped at MAX_ENTRIES (oldest first) whenever an answer is stored.
+
+The cache is shared by every user, so callers must not look up or store questions that
+carry personal context.
+"""
+
+import os
+import time
+import uuid
+import functools
+import threading
+from typing import List, Optional
+
+FACTUAL_CACHE_PATH = "./rag/anaya_factual_cache"
+FACTUAL_CACHE_COLLECTION = "anaya-factual-cache"
+# Default minimum cosine similarity for a hit; override with ANAYA_FACTUAL_CACHE_THRESHOLD
+SIMILARITY_THRESHOLD = 0.92
+ENTRY_TTL_SECONDS = 7 * 24 * 60 * 60
+MAX_ENTRIES = 5000
+
+_collection = None
+_collection_lock = threading.Lock()
+
+
+def _get_collection():
+    """Opens (or creates) the cache collection on first use."""
+    global _collection
+    with _collection_lock:
+        if _collection is None:
+            import chromadb
+
+            client = chromadb.PersistentClient(path=FACTUAL_CACHE_PATH)
+            _collection = client.get_or_create_collection(
+                name=FACTUAL_CACHE_COLLECTION,
+                metadata={"hnsw:space": "cosine"}
+            )
+        return _collection
+
+
+@functools.cache
+def _similarity_threshold() -> float:
+    """ANAYA_FACTUAL_CACHE_THRESHOLD (default SIMILARITY_THRESHOLD), read on first use rather than at import."""
+    from agents._llm import load_env
+
+    load_env()
+    value = os.getenv("ANAYA_FACTUAL_CACHE_THRESHOLD")
+    if not value:
+        return SIMILARITY_THRESHOLD
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Ignoring invalid ANAYA_FACTUAL_CACHE_THRESHOLD={value!r}; using {SIMILARITY_THRESHOLD}")
+        return SIMILARITY_THRESHOLD
+
+
+def embed_question(question: str) -> Optional[List[float]]:
+    """Embeds a question for cache lookup, or returns None if embedding fails."""
+    try:
+        from rag.simple_rag import query_embed_model
+
+        return query_embed_model.embed_query(question)
+    except Exception as e:
+        print(f"Factual cache embedding failed: {e}")
+        return None
+
+
+def lookup(embedding: List[float], cache_tag: str) -> Optional[str]:
+    """Returns the cached answer for the nearest fresh question above the similarity threshold."""
+    try:
+        # Expired entries are excluded by the query itself, not just checked on the top hit
+        result = _get_collection().query(
+            query_embeddings=[embedding],
+            n_results=1,
+            where={"$and": [
+                {"cache_tag": cache_tag},
+                {"created_at": {"$gte": time.time() - ENTRY_TTL_SECONDS}}
+            ]},
+            include=["metadatas", "distances"]
+        )
+    except Exception as e:
+        print(f"Factual cache lookup failed: {e}")
+        return None
+
+    if not result["ids"] or not result["ids"][0]:
+        return None
+
+    metadata = result["metadatas"][0][0]
+    similarity = 1.0 - result["distances"][0][0]
+
+    return metadata["answer"] if similarity >= _similarity_threshold() else None
+
+
+def _evict(collection) -> None:
+    """Deletes expired entries, then the oldest ones while the collection exceeds MAX_ENTRIES."""
+    collection.delete(where={"created_at": {"$lt": time.time() - ENTRY_TTL_SECONDS}})
+
+    excess = collection.count() - MAX_ENTRIES
+    if excess > 0:
+        entries = collection.get(include=["metadatas"])
+        by_age = sorted(zip(entries["ids"], entries["metadatas"]), key=lambda entry: entry[1]["created_at"])
+        collection.delete(ids=[entry_id for entry_id, _ in by_age[:excess]])
+
+
+def store(question: str, embedding: List[float], answer: str, cache_tag: str) -> None:
+    """Adds a generated answer to the cache."""
+    try:
+        collection = _get_collection()
+        collection.add(
+            ids=[str(uuid.uuid4())],
+            embeddings=[embedding],
+            documents=[question],
+            metadatas=[{"answer": answer, "cache_tag": cache_tag, "created_at": time.time()}]
+        )
+        _evict(collection)
+    except Exception as e:
+        print(f"Factual cache store failed: {e}")
@@ -0,0 +1,21 @@
+"""
+Canonical JSON serialization for prompt variables.
+
+Stability invariant: every non-string value interpolated into an agent prompt goes through
+`canonical_json`, so the same state always renders to the same bytes (sorted keys, compact
+separators, no ASCII escaping) independent of dict insertion order or Python's repr. This
+keeps prompt prefixes reproducible across runs for Gemini's prefix cache and the LLM cache.
+"""
+
+import json
+from typing import Any
+
+
+def canonical_json(value: Any) -> str:
+    """Serializes a value to its canonical JSON form."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def prompt_value(value: Any) -> str:
+    """Passes strings through unchanged and renders any other value as canonical JSON."""
+    return value if isinstance(value, str) else canonical_json(value)
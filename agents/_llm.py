@@ -0,0 +1,52 @@
+"""
+Shared Gemini chat models for Anaya AI agents.
+
+Models are built on first use rather than at import, so importing an agent module (for example
+the crisis agent on a safety path) does not pull in the Gemini SDK, gRPC and protobuf. Environment
+variables are loaded once, by the first model or by `load_env()` for modules that read settings.
+Temperature (like the other generation settings) is sent with each request, so the temperature
+variants are shallow copies that share one underlying API client and connection pool per model.
+"""
+
+import functools
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+FAST_MODEL = "gemini-flash-latest"
+POWERFUL_MODEL = "gemini-2.5-pro"
+
+
+@functools.cache
+def load_env() -> None:
+    """Loads the .env file into the process environment (once)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+@functools.cache
+def _get_base_llm(model: str) -> "BaseChatModel":
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    load_env()
+    return ChatGoogleGenerativeAI(model=model, temperature=0)
+
+
+@functools.cache
+def get_llm(model: str, temperature: float = 0) -> "BaseChatModel":
+    """Returns the shared instance of `model` sampled at `temperature`, creating it on first use."""
+    base = _get_base_llm(model)
+    if temperature == base.temperature:
+        return base
+    return base.model_copy(update={"temperature": temperature})
+
+
+def get_fast_llm(temperature: float = 0) -> "BaseChatModel":
+    return get_llm(FAST_MODEL, temperature)
+
+
+def get_powerful_llm(temperature: float = 0) -> "BaseChatModel":
+    return get_llm(POWERFUL_MODEL, temperature)
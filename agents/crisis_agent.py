@@ -1,19 +1,5 @@
-import os
-
-import json
-
-from typing import List, TypedDict
-
-from dotenv import load_dotenv
-
 from pydantic import BaseModel, Field
 
-from langchain_core.prompts import ChatPromptTemplate
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from langchain_core.language_models.chat_models import BaseChatModel
-
 class CrisisResponse(BaseModel):
     """The output from the Crisis Agent."""
     response: str = Field(description="The pre-defined, direct, and safe resource list for a user in crisis.")
@@ -26,6 +12,13 @@ Here are some resources for immediate support in Canada:
 *   **Talk Suicide Canada:** Call 1-833-456-4566.
 *   **For any emergency:** Call 911 immediately."""
 
+# The crisis response never varies, so it is validated once at import and shared by every call.
+_CRISIS_RESPONSE = CrisisResponse(response=CANADIAN_CRISIS_RESOURCES)
+
+# Pre-encoded copy for callers that write straight to an HTTP/SSE response.
+# bytes are immutable, so this is safe to share across threads and async tasks.
+_CRISIS_BYTES = CANADIAN_CRISIS_RESOURCES.encode("utf-8")
+
 
 def crisis_agent(user_message: str) -> CrisisResponse:
     """
@@ -35,6 +28,16 @@ def crisis_agent(user_message: str) -> CrisisResponse:
         user_message (str): The user's message that has been identified as a crisis.
 
     Returns:
-        CrisisResponse: A Pydantic object containing the pre-defined, safe response.
+        CrisisResponse: A shared, read-only Pydantic object containing the pre-defined, safe response.
+    """
+    return _CRISIS_RESPONSE
+
+
+def crisis_response_bytes() -> bytes:
+    """
+    Returns the crisis response as UTF-8 bytes, ready to be written to a response stream without re-encoding.
+
+    Returns:
+        bytes: The shared, immutable UTF-8 encoding of the pre-defined crisis response.
     """
-    return CrisisResponse(response=CANADIAN_CRISIS_RESOURCES)
+    return _CRISIS_BYTES
@@ -2,27 +2,25 @@ import os
 
 import json
 
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
+import functools
 
-from dotenv import load_dotenv
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, TYPE_CHECKING
 
 from pydantic import BaseModel, Field
 
-from langchain_core.prompts import ChatPromptTemplate
+from agents._json import prompt_value
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from agents._llm import get_fast_llm
 
-from langchain_core.language_models.chat_models import BaseChatModel
-
-load_dotenv()
-
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0.5)
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class DialogueManagerResponse(BaseModel):
     """The output from the Dialogue Manager Agent."""
     response: str = Field(description="The clear, empathetic, and user-facing text for managing the conversation.")
 
-DIALOGUE_MANAGER_PROMPT = """
+# Static persona block: no template variables, so it forms a byte-stable prefix for Gemini's implicit prompt cache.
+DIALOGUE_MANAGER_SYSTEM_PROMPT = """
 You are a calm, clear, and empathetic Dialogue Manager. You are the "conversational choreographer," responsible for ensuring the user's experience is smooth, coherent, and graceful. Your primary function is to generate natural transitions and clarifications that are deeply grounded in the immediate context of the conversation.
 
 **Core Persona**
@@ -61,8 +59,10 @@ You will interpret the `task_description` and use these principles to craft a co
 
 **CRITICAL SAFETY PROTOCOLS**
 *   Your primary function is to create safety through clarity, consent, and attentive listening.
+"""
 
----
+# Dynamic per-turn context, sent as a separate human message after the static system block.
+DIALOGUE_MANAGER_CONTEXT_PROMPT = """
 **CONTEXT FOR THIS TASK:**
 
 // Task & User State
@@ -77,6 +77,42 @@ You will interpret the `task_description` and use these principles to craft a co
 `user_message`: "{user_message}"
 """
 
+# Template and chain are built on first use, so importing this module does not load LangChain's runtime.
+@functools.cache
+def _get_dm_template():
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        ("system", DIALOGUE_MANAGER_SYSTEM_PROMPT),
+        ("human", DIALOGUE_MANAGER_CONTEXT_PROMPT),
+    ])
+
+@functools.cache
+def _get_dm_chain():
+    return _get_dm_template() | get_fast_llm(0.5).with_structured_output(DialogueManagerResponse)
+
+BATCH_MAX_CONCURRENCY = 16
+
+def _dm_inputs(
+    chat_history: str,
+    user_message: str,
+    task_description: str,
+    guiding_intentions: List[str],
+    user_journey: str,
+    personal_flag: bool,
+    user_name: str
+) -> Dict[str, Any]:
+    """Builds the prompt variables shared by the single and batch dialogue manager paths (see agents._json)."""
+    return {
+        "chat_history": chat_history,
+        "user_message": user_message,
+        "task_description": task_description,
+        "guiding_intentions": prompt_value(guiding_intentions),
+        "user_journey": prompt_value(user_journey),
+        "personal_flag": prompt_value(personal_flag),
+        "user_name": user_name,
+    }
+
 def dialogue_manager_agent(
     chat_history: str,
     user_message: str,
@@ -85,7 +121,7 @@ def dialogue_manager_agent(
     user_journey: str,
     personal_flag: bool,
     user_name: str,
-    llm: BaseChatModel = llm_fast
+    llm: Optional["BaseChatModel"] = None
 ) -> DialogueManagerResponse:
     """
     Manages the conversational flow with empathy, clarity, and safety by generating
@@ -99,23 +135,40 @@ def dialogue_manager_agent(
         user_journey: The user's long-term narrative of progress and skill-building over time.
         personal_flag: A flag indicating if the task involves sensitive personal data.
         user_name: The user's first name, to be used only when `personal_flag` is true.
-        llm: An initialized Gemini model instance.
+        llm: An initialized Gemini model instance. Defaults to the shared fast model.
 
     Returns:
         DialogueManagerResponse: A Pydantic object containing the clear, user-facing response.
     """
-    dialogue_prompt_template = ChatPromptTemplate.from_template(DIALOGUE_MANAGER_PROMPT)
-    dialogue_chain = dialogue_prompt_template | llm.with_structured_output(DialogueManagerResponse)
+    inputs = _dm_inputs(
+        chat_history=chat_history,
+        user_message=user_message,
+        task_description=task_description,
+        guiding_intentions=guiding_intentions,
+        user_journey=user_journey,
+        personal_flag=personal_flag,
+        user_name=user_name,
+    )
+
+    if llm is not None:
+        dialogue_chain = _get_dm_template() | llm.with_structured_output(DialogueManagerResponse)
+    else:
+        dialogue_chain = _get_dm_chain()
+
+    return dialogue_chain.invoke(inputs)
+
+async def dialogue_manager_agent_batch(inputs: List[Dict[str, Any]]) -> List[DialogueManagerResponse]:
+    """
+    Runs the dialogue manager for many independent turns concurrently (e.g. dataset evaluations).
 
-    result = dialogue_chain.invoke({
-        "chat_history": chat_history,
-        "user_message": user_message,
-        "task_description": task_description,
-        "guiding_intentions": guiding_intentions,
-        "user_journey": user_journey,
-        "personal_flag": personal_flag,
-        "user_name": user_name,
-    })
+    Args:
+        inputs: One dict per turn, holding the keyword arguments of `dialogue_manager_agent` (without `llm`).
 
-    return result
+    Returns:
+        List[DialogueManagerResponse]: The responses, in the same order as `inputs`.
+    """
+    return await _get_dm_chain().abatch(
+        [_dm_inputs(**kwargs) for kwargs in inputs],
+        config={"max_concurrency": BATCH_MAX_CONCURRENCY}
+    )
 
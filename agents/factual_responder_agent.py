@@ -1,33 +1,106 @@
 import os
 import json
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
-from dotenv import load_dotenv
+import asyncio
+import functools
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, Tuple
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.output_parsers import StrOutputParser
 
-load_dotenv()
+from agents import _factual_cache
+from agents._cache import get_cached_llm
+from agents._llm import FAST_MODEL
 
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0)
+FACTUAL_TEMPERATURE = 0
 
-def factual_responder_agent(question):
+# Semantic cache: paraphrased questions ("What is the capital of France?" / "Tell me France's capital")
+# land close together in embedding space, so a close match reuses the earlier answer (see agents._factual_cache).
+# This is only safe because the model runs at temperature 0; the tag ties entries to that configuration.
+_SEMANTIC_CACHE_TAG = f"{FAST_MODEL}|temperature={FACTUAL_TEMPERATURE}"
+
+BATCH_MAX_CONCURRENCY = 16
+
+FACTUAL_RESPONDER_PROMPT = """Answer the user's question directly and concisely based on your knowledge.
+
+User Question: {question}
+
+Provide a clear, factual answer. If you're unsure, say so rather than speculating."""
+
+
+@functools.cache
+def _get_factual_chain():
+    """Builds the answer chain on first use, so importing this module does not load LangChain's runtime."""
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    # Deterministic at temperature 0, so identical questions are answered from the SQLite cache
+    return (
+        ChatPromptTemplate.from_template(FACTUAL_RESPONDER_PROMPT)
+        | get_cached_llm(FAST_MODEL)
+        | StrOutputParser()
+    )
+
+
+def _embed_and_lookup(question: str, personal_flag: bool) -> Tuple[Optional[List[float]], Optional[str]]:
+    """
+    Embeds a question and looks it up in the semantic cache (blocking; see factual_responder_agent_batch).
+    Personal questions skip the cache: no embedding is returned, so their answers are not stored either.
+    """
+    if personal_flag:
+        return None, None
+    embedding = _factual_cache.embed_question(question)
+    if embedding is None:
+        return None, None
+    return embedding, _factual_cache.lookup(embedding, _SEMANTIC_CACHE_TAG)
+
+
+def factual_responder_agent(question, personal_flag=False):
     """
     Answers factual questions using the LLM's knowledge base.
     Web search capability removed - uses LLM knowledge only.
+    Near-duplicate questions are served from the persistent semantic cache, which is
+    shared by all users, so steps flagged as personal bypass it.
     """
-    
-    factual_prompt = """Answer the user's question directly and concisely based on your knowledge.
 
-User Question: {question}
+    embedding, cached_answer = _embed_and_lookup(question, personal_flag)
+    if cached_answer is not None:
+        return cached_answer
 
-Provide a clear, factual answer. If you're unsure, say so rather than speculating."""
+    generation = _get_factual_chain().invoke({"question": question})
 
-    generation = (
-        ChatPromptTemplate.from_template(factual_prompt) 
-        | llm_fast 
-        | StrOutputParser()
-    ).invoke({"question": question})
+    if embedding is not None:
+        _factual_cache.store(question, embedding, generation, _SEMANTIC_CACHE_TAG)
+
+    return generation
+
+
+async def factual_responder_agent_batch(questions: List[str], personal_flags: Optional[List[bool]] = None) -> List[str]:
+    """
+    Answers many factual questions concurrently, serving near-duplicates from the semantic cache.
+
+    Args:
+        questions: The questions to answer.
+        personal_flags: Per-question flags; flagged questions bypass the shared cache.
+
+    Returns:
+        List[str]: The answers, in the same order as `questions`.
+    """
+    # Embedding and the Chroma lookup/store calls block, so they run off the event loop
+    personal_flags = personal_flags or [False] * len(questions)
+    lookups = await asyncio.gather(*(
+        asyncio.to_thread(_embed_and_lookup, q, personal) for q, personal in zip(questions, personal_flags)
+    ))
+    embeddings = [embedding for embedding, _ in lookups]
+    answers: List[Optional[str]] = [answer for _, answer in lookups]
+
+    misses = [i for i, answer in enumerate(answers) if answer is None]
+    generations = await _get_factual_chain().abatch(
+        [{"question": questions[i]} for i in misses],
+        config={"max_concurrency": BATCH_MAX_CONCURRENCY}
+    )
+    for i, generation in zip(misses, generations):
+        answers[i] = generation
+    await asyncio.gather(*(
+        asyncio.to_thread(_factual_cache.store, questions[i], embeddings[i], answers[i], _SEMANTIC_CACHE_TAG)
+        for i in misses if embeddings[i] is not None
+    ))
 
-    return generation
\ No newline at end of file
+    return answers
@@ -2,21 +2,25 @@ import os
 
 import json
 
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
+import threading
 
-from dotenv import load_dotenv
+import functools
 
-from pydantic import BaseModel, Field
+from collections import OrderedDict
+
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, Tuple, TYPE_CHECKING
 
-from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from agents._json import canonical_json
 
-from langchain_core.language_models.chat_models import BaseChatModel
+from agents._llm import get_fast_llm, load_env
 
-load_dotenv()
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0.2)
+def _get_ltm_llm() -> "BaseChatModel":
+    return get_fast_llm(0.2)
 
 class NewMemorySnapshot(BaseModel):
     date: str = Field(description="The date of the conversation.")
@@ -35,7 +39,8 @@ class LTMAnalysisResult(BaseModel):
     new_guiding_intentions: str = Field(description="The single most important new long-term goal the user expressed, or an empty string if none.")
     new_memory_snapshot: NewMemorySnapshot = Field(description="The new memory snapshot object containing the core details.")
 
-LONG_TERM_MEMORY_PROMPT = """
+# Static instructions and examples only; the `{{ }}` pairs are escaped literal braces, not template variables.
+LONG_TERM_MEMORY_SYSTEM_PROMPT = """
 You are a highly insightful and analytical Narrative Psychologist. Your task is to review a user's `chat_history` and extract key pieces of new information that will be used to update their profile.
 
 **Core Principles**
@@ -89,27 +94,143 @@ You MUST generate the following fields. The examples provided are based on a hyp
           "session_insight": "Realized the feeling is not an enemy, but a signal from their body to rest."
         }}
         ```
----
+"""
+
+# Dynamic per-session context, sent as a separate human message after the static system block.
+# Fields are ordered from least to most frequently changing for a given user, so consecutive
+# analyses share the longest possible prompt prefix; the new transcript and date come last.
+LONG_TERM_MEMORY_CONTEXT_PROMPT = """
 **CONTEXT FOR THIS TASK:**
 
 // Read-Only Context
 `UserProfile`: "{user_profile}"
 
 // Previous Long-Term Memory State
-`previous_user_journey`: {previous_user_journey}
 `previous_personal_toolkit`: {previous_personal_toolkit}
 `previous_guiding_intentions`: {previous_guiding_intentions}
+`previous_user_journey`: {previous_user_journey}
 `previous_memory_threads`: {previous_memory_threads}
 
 // New Information to Process
+`focus_emotion`: "{focus_emotion}"
 `chat_history`:
 ---
 {chat_history}
 ---
-`focus_emotion`: "{focus_emotion}"
 `current_date`: "{current_date}"
 """
 
+# Primary path: plain JSON mode parsed client-side, which avoids sending a tool spec with every call.
+# If the reply does not validate, the same inputs are retried through the structured-output chain.
+LTM_JSON_OUTPUT_INSTRUCTION = (
+    "\nRespond ONLY with a single JSON object with exactly these keys: "
+    + ", ".join(f"`{name}`" for name in LTMAnalysisResult.model_fields)
+    + ". `new_memory_snapshot` is the nested object described above.\n"
+)
+
+# Templates and chains are built on first use, so importing this module does not load LangChain's runtime.
+@functools.cache
+def _get_ltm_template():
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        ("system", LONG_TERM_MEMORY_SYSTEM_PROMPT),
+        ("human", LONG_TERM_MEMORY_CONTEXT_PROMPT),
+    ])
+
+@functools.cache
+def _get_default_ltm_chain():
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    llm = _get_ltm_llm()
+
+    # Building the structured-output runnable reflects LTMAnalysisResult into a JSON schema, so do it once.
+    structured_chain = _get_ltm_template() | llm.with_structured_output(LTMAnalysisResult)
+
+    json_template = ChatPromptTemplate.from_messages([
+        ("system", LONG_TERM_MEMORY_SYSTEM_PROMPT + LTM_JSON_OUTPUT_INSTRUCTION),
+        ("human", LONG_TERM_MEMORY_CONTEXT_PROMPT),
+    ])
+    llm_json = llm.model_copy(update={"response_mime_type": "application/json"})
+    json_chain = json_template | llm_json | StrOutputParser() | LTMAnalysisResult.model_validate_json
+
+    return json_chain.with_fallbacks([structured_chain], exceptions_to_handle=(ValueError,))
+
+# Chains for the most recent caller-supplied models, keyed by id(llm). Chat models are unhashable
+# pydantic objects and each chain holds its model anyway, so a weak-key mapping cannot apply; instead
+# each entry keeps its model alive (its id cannot be recycled while cached) and the LRU bound
+# releases models that are no longer used.
+_CUSTOM_LTM_CHAIN_CACHE_SIZE = 8
+_custom_ltm_chains: "OrderedDict[int, Tuple[BaseChatModel, Any]]" = OrderedDict()
+_custom_ltm_chains_lock = threading.Lock()
+
+def _get_ltm_chain(llm: Optional["BaseChatModel"] = None):
+    """Returns the LTM chain for `llm` (the shared default when None), building and caching it on first use."""
+    if llm is None:
+        return _get_default_ltm_chain()
+    with _custom_ltm_chains_lock:
+        entry = _custom_ltm_chains.get(id(llm))
+        if entry is not None and entry[0] is llm:
+            _custom_ltm_chains.move_to_end(id(llm))
+            return entry[1]
+
+    chain = _get_ltm_template() | llm.with_structured_output(LTMAnalysisResult)
+
+    with _custom_ltm_chains_lock:
+        _custom_ltm_chains[id(llm)] = (llm, chain)
+        _custom_ltm_chains.move_to_end(id(llm))
+        if len(_custom_ltm_chains) > _CUSTOM_LTM_CHAIN_CACHE_SIZE:
+            _custom_ltm_chains.popitem(last=False)
+    return chain
+
+BATCH_MAX_CONCURRENCY = 16
+
+# Older snapshots are already distilled into `previous_user_journey`, so only the most recent K per
+# emotion are sent to the model; this bounds prompt size for long-horizon users.
+MAX_SNAPSHOTS_PER_EMOTION = 20
+
+@functools.cache
+def _max_snapshots_per_emotion() -> int:
+    """ANAYA_LTM_MAX_SNAPSHOTS (0 sends none), read on first use rather than at import."""
+    load_env()
+    value = os.getenv("ANAYA_LTM_MAX_SNAPSHOTS")
+    if not value:
+        return MAX_SNAPSHOTS_PER_EMOTION
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        print(f"Ignoring invalid ANAYA_LTM_MAX_SNAPSHOTS={value!r}; using {MAX_SNAPSHOTS_PER_EMOTION}")
+        return MAX_SNAPSHOTS_PER_EMOTION
+
+def _recent_snapshots(memory_threads: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    max_snapshots = _max_snapshots_per_emotion()
+    # snapshots[-0:] would be the whole list, so 0 is handled separately
+    return {emotion: snapshots[-max_snapshots:] if max_snapshots else []
+            for emotion, snapshots in memory_threads.items()}
+
+def _ltm_inputs(
+    user_profile: str,
+    previous_user_journey: List[str],
+    previous_personal_toolkit: Dict[str, List[str]],
+    previous_guiding_intentions: List[str],
+    previous_memory_threads: Dict[str, List[Dict]],
+    chat_history: str,
+    focus_emotion: str,
+    current_date: str
+) -> Dict[str, Any]:
+    """Builds the prompt variables shared by the single and batch LTM analysis paths (see agents._json)."""
+    return {
+        "user_profile": user_profile,
+        "previous_user_journey": canonical_json(previous_user_journey),
+        "previous_personal_toolkit": canonical_json(previous_personal_toolkit),
+        "previous_guiding_intentions": canonical_json(previous_guiding_intentions),
+        "previous_memory_threads": canonical_json(_recent_snapshots(previous_memory_threads)),
+        "chat_history": chat_history,
+        "focus_emotion": focus_emotion,
+        "current_date": current_date,
+    }
+
 def analyze_conversation_for_ltm(
     user_profile: str,
     previous_user_journey: List[str],
@@ -119,27 +240,49 @@ def analyze_conversation_for_ltm(
     chat_history: str,
     focus_emotion: str,
     current_date: str,
-    llm: BaseChatModel = llm_fast
+    llm: Optional["BaseChatModel"] = None
 ) -> LTMAnalysisResult:
     """
     Analyzes a conversation transcript to synthesize a new journey and extract insights.
     """
-    ltm_prompt_template = ChatPromptTemplate.from_template(LONG_TERM_MEMORY_PROMPT)
-    ltm_chain = ltm_prompt_template | llm.with_structured_output(LTMAnalysisResult)
-
-    analysis_result = ltm_chain.invoke({
-        "user_profile": user_profile,
-        "previous_user_journey": json.dumps(previous_user_journey, indent=2),
-        "previous_personal_toolkit": json.dumps(previous_personal_toolkit, indent=2),
-        "previous_guiding_intentions": previous_guiding_intentions,
-        "previous_memory_threads": json.dumps(previous_memory_threads, indent=2),
-        "chat_history": chat_history,
-        "focus_emotion": focus_emotion,
-        "current_date": current_date
-    })
+    inputs = _ltm_inputs(
+        user_profile=user_profile,
+        previous_user_journey=previous_user_journey,
+        previous_personal_toolkit=previous_personal_toolkit,
+        previous_guiding_intentions=previous_guiding_intentions,
+        previous_memory_threads=previous_memory_threads,
+        chat_history=chat_history,
+        focus_emotion=focus_emotion,
+        current_date=current_date
+    )
+
+    analysis_result = _get_ltm_chain(llm).invoke(inputs)
 
     return analysis_result
 
+async def analyze_conversations_for_ltm_batch(inputs: List[Dict[str, Any]]) -> List[LTMAnalysisResult]:
+    """
+    Analyzes many conversations concurrently, e.g. for offline LTM re-analysis.
+
+    Args:
+        inputs: One dict per conversation, holding the keyword arguments of `analyze_conversation_for_ltm` (without `llm`).
+
+    Returns:
+        List[LTMAnalysisResult]: The analyses, in the same order as `inputs`.
+    """
+    return await _get_default_ltm_chain().abatch(
+        [_ltm_inputs(**kwargs) for kwargs in inputs],
+        config={"max_concurrency": BATCH_MAX_CONCURRENCY}
+    )
+
+def _extend_unique(tools: List[str], new_tools: List[str]) -> None:
+    """Appends the tools not already present, preserving order, with O(1) membership checks."""
+    seen = set(tools)
+    for tool in new_tools:
+        if tool not in seen:
+            seen.add(tool)
+            tools.append(tool)
+
 def consolidate_memory(
     analysis: LTMAnalysisResult,
     previous_user_journey: List[str],
@@ -151,25 +294,37 @@ def consolidate_memory(
 ) -> Dict:
     """
     Takes the LLM's analysis and reliably updates the old LTM state.
+
+    The previous state is never mutated. Only the containers that receive a new entry are
+    copied; untouched toolkit lists and memory threads are shared with the previous state,
+    so the cost of a call does not grow with the user's total number of memory snapshots.
     """
 
     new_journey = previous_user_journey.copy()
-    new_toolkit = {k: v.copy() for k, v in previous_personal_toolkit.items()}
+    new_toolkit = dict(previous_personal_toolkit)
     new_intentions = previous_guiding_intentions.copy()
-    new_memory_threads = {k: v.copy() for k, v in previous_memory_threads.items()}
+    new_memory_threads = dict(previous_memory_threads)
 
     # UserJourney Update
     new_journey.append(f"{current_date}: {analysis.UserJourney}")
 
     # PersonalToolkit Update
-    new_toolkit["user_found_helpful"].extend([tool for tool in analysis.identified_helpful_tools if tool not in new_toolkit["user_found_helpful"]])
-    new_toolkit["user_found_unhelpful"].extend([tool for tool in analysis.identified_unhelpful_tools if tool not in new_toolkit["user_found_unhelpful"]])
+    for key, tools in (("user_found_helpful", analysis.identified_helpful_tools),
+                       ("user_found_unhelpful", analysis.identified_unhelpful_tools)):
+        if tools:
+            new_toolkit[key] = new_toolkit[key].copy()
+            _extend_unique(new_toolkit[key], tools)
 
     # GuidingIntentions Update
     new_intentions.append(analysis.new_guiding_intentions)
 
     # MemoryThreads Update
-    new_memory_threads.setdefault(focus_emotion, []).append(analysis.new_memory_snapshot.model_dump())
+    # The snapshot was already validated by the chain and only holds str fields, so a shallow copy of its
+    # attributes equals model_dump() without a second serialization pass.
+    new_memory_threads[focus_emotion] = [
+        *previous_memory_threads.get(focus_emotion, []),
+        analysis.new_memory_snapshot.__dict__.copy()
+    ]
 
     return {
         "UserJourney": new_journey,
@@ -2,28 +2,16 @@ import os
 
 import json
 
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
-
-from dotenv import load_dotenv
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, TYPE_CHECKING
 
 from pydantic import BaseModel, Field, conint
 
-from langchain_core.prompts import ChatPromptTemplate
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from langchain_core.output_parsers import PydanticOutputParser
-
-from langchain_core.language_models.chat_models import BaseChatModel
-
-
 import logging
 
-load_dotenv()
-
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0)
+from agents._llm import get_powerful_llm
 
-llm_powerful = ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0)
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class ExecutionStep(BaseModel):
 
@@ -129,7 +117,7 @@ You are a conversational planner and an intelligent information extractor. Read
 `user_message`: {user_message}
 """
 
-def generate_execution_plan(user_message: str, chat_history: str, llm: BaseChatModel = llm_powerful) -> Plan:
+def generate_execution_plan(user_message: str, chat_history: str, llm: Optional["BaseChatModel"] = None) -> Plan:
     """
     Generates a structured execution plan for a conversational turn.
 
@@ -146,6 +134,11 @@ def generate_execution_plan(user_message: str, chat_history: str, llm: BaseChatM
         A Pydantic object of type `Plan` containing the user's original
         message and an ordered list of execution steps.
     """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if llm is None:
+        llm = get_powerful_llm()
+
     # Create the prompt template with the input variables
     planner_prompt_template = ChatPromptTemplate.from_template(PLANNER_PROMPT)
 
@@ -2,21 +2,14 @@ import os
 
 import json
 
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
-
-from dotenv import load_dotenv
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, TYPE_CHECKING
 
 from pydantic import BaseModel, Field
 
-from langchain_core.prompts import ChatPromptTemplate
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from langchain_core.language_models.chat_models import BaseChatModel
+from agents._llm import get_fast_llm
 
-load_dotenv()
-
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0.2)
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class ReflectionResponse(BaseModel):
     """The output from the Reflection Agent."""
@@ -70,7 +63,7 @@ def reflection_agent(
     user_message: str,
     session_mood: str,
     task_description: str,
-    llm: BaseChatModel = llm_fast
+    llm: Optional["BaseChatModel"] = None
 ) -> ReflectionResponse:
     """
     Generates a short, empathetic reply to build rapport and validate the user. This agent handles paraphrasing, validation, and emotional mirroring.
@@ -87,6 +80,11 @@ def reflection_agent(
     Returns:
         ReflectionResponse: A Pydantic object containing the short, empathetic response.
     """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if llm is None:
+        llm = get_fast_llm(0.2)
+
     reflection_prompt_template = ChatPromptTemplate.from_template(REFLECTION_AGENT_PROMPT)
     reflection_chain = reflection_prompt_template | llm.with_structured_output(ReflectionResponse)
 
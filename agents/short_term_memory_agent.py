@@ -2,21 +2,14 @@ import os
 
 import json
 
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
-
-from dotenv import load_dotenv
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, TYPE_CHECKING
 
 from pydantic import BaseModel, Field
 
-from langchain_core.prompts import ChatPromptTemplate
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from langchain_core.language_models.chat_models import BaseChatModel
+from agents._llm import get_fast_llm
 
-load_dotenv()
-
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0.2)
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class ShortTermMemory(BaseModel):
     """The structured output of the Short-Term Memory Agent for a single turn."""
@@ -72,7 +65,7 @@ You MUST extract the following five fields by analyzing the full conversational
 `user_message`: "{user_message}"
 """
 
-def short_term_memory_agent(chat_history: str, user_message: str, llm: BaseChatModel = llm_fast) -> ShortTermMemory:
+def short_term_memory_agent(chat_history: str, user_message: str, llm: Optional["BaseChatModel"] = None) -> ShortTermMemory:
     """
     Analyzes a single conversational turn to extract key data points for STM.
 
@@ -87,6 +80,11 @@ def short_term_memory_agent(chat_history: str, user_message: str, llm: BaseChatM
     Returns:
         ShortTermMemory: A Pydantic object containing the structured STM data.
     """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if llm is None:
+        llm = get_fast_llm(0.2)
+
     stm_prompt_template = ChatPromptTemplate.from_template(SHORT_TERM_MEMORY_PROMPT)
     stm_chain = stm_prompt_template | llm.with_structured_output(ShortTermMemory)
 
@@ -2,21 +2,14 @@ import os
 
 import json
 
-from typing import List, TypedDict
-
-from dotenv import load_dotenv
+from typing import List, Optional, TypedDict, TYPE_CHECKING
 
 from pydantic import BaseModel, Field
 
-from langchain_core.prompts import ChatPromptTemplate
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from langchain_core.language_models.chat_models import BaseChatModel
+from agents._llm import get_fast_llm
 
-load_dotenv()
-
-llm_fast = ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=0)
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class SynthesisResult(BaseModel):
     """The final, synthesized response to be shown to the user."""
@@ -69,7 +62,7 @@ def synthesize_response(
     chat_history: str,
     user_message: str,
     completed_steps: List[str],
-    llm: BaseChatModel = llm_fast
+    llm: Optional["BaseChatModel"] = None
 ) -> SynthesisResult:
     """
     Synthesizes a final, user-facing response from multiple agent outputs.
@@ -99,6 +92,11 @@ def synthesize_response(
 
     completed_steps_json = json.dumps(completed_steps_dicts, indent=2)
 
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if llm is None:
+        llm = get_fast_llm()
+
     synthesis_prompt_template = ChatPromptTemplate.from_template(SYNTHESIS_AGENT_PROMPT)
     synthesis_chain = synthesis_prompt_template | llm.with_structured_output(SynthesisResult)
 
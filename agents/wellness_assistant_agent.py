@@ -1,18 +1,12 @@
 import os
 import json
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
-from dotenv import load_dotenv
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, TYPE_CHECKING
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.language_models.chat_models import BaseChatModel
 
-load_dotenv()
+from agents._llm import get_powerful_llm
 
-llm_powerful = ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0.2)
-
-# Import RAG retriever
-from rag.simple_rag import get_retriever
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class WellnessResponse(BaseModel):
     """The output from the Wellness Assistant."""
@@ -143,7 +137,7 @@ def wellness_assistant_agent(
     focus_emotion: str,
     memory_thread: Dict[str, List[str]],
     personal_toolkit: Dict[str, List[str]],
-    llm: BaseChatModel = llm_powerful
+    llm: Optional["BaseChatModel"] = None
 ) -> WellnessResponse:
     """
     Generates a therapy-style response, using a rich, holistic context of the
@@ -172,6 +166,9 @@ def wellness_assistant_agent(
     # RAG RETRIEVAL - Search knowledge base for relevant techniques
     knowledge_context = ""
     try:
+        # Imported here so loading this module does not build the embedding model.
+        from rag.simple_rag import get_retriever
+
         retriever = get_retriever()
         if retriever:
             # Build search query from user message and focus emotion
@@ -194,6 +191,11 @@ def wellness_assistant_agent(
         print(f"RAG retrieval failed: {e}")
         knowledge_context = "No additional knowledge context available."
     
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if llm is None:
+        llm = get_powerful_llm(0.2)
+
     wellness_prompt_template = ChatPromptTemplate.from_template(WELLNESS_ASSISTANT_PROMPT)
     wellness_chain = wellness_prompt_template | llm.with_structured_output(WellnessResponse)
 
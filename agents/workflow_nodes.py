@@ -81,7 +81,7 @@ def execute_tools_node(state: WorkflowState) -> Dict:
 
         elif agent_name == "factual_responder_agent":
 
-            result_text = factual_responder_agent(agent_inputs)
+            result_text = factual_responder_agent(agent_inputs, personal_flag=personal_flag)
             completed_steps.append(f"{agent_name}: {result_text}")
 
         elif agent_name == "dialogue_manager_agent":
@@ -1,28 +1,52 @@
 import os
+import csv
 import json
 import uuid
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
-import pandas as pd
 import warnings
 
 warnings.filterwarnings("ignore")
 
-from typing import List, Dict, Optional, Literal, TypedDict, Union, Any
+from typing import List, Dict, Optional, Literal, TypedDict, Union, Any, Tuple
 
 from agents.short_term_memory_agent import short_term_memory_agent
 from agents.long_term_memory_agent import analyze_conversation_for_ltm, consolidate_memory
 from agents.state import WorkflowState
+from core.utils import STM_COLUMNS, LTM_COLUMNS
 
-def short_term_memory_event_log(
-    state: WorkflowState, 
-    user_id: str, 
-    session_id: str, 
-    updated_completed_intents_in_flow: str, 
-    updated_session_primary_skill: str, 
-    stm_df: pd.DataFrame
-) -> pd.DataFrame():
+logger = logging.getLogger(__name__)
+
+STM_DATA_PATH = "./data/STM_Data.csv"
+LTM_DATA_PATH = "./data/LTM_Data.csv"
+
+# Background STM writer: chat turns enqueue rows and return; a daemon thread appends them.
+# The queue is bounded, so a stalled disk slows producers down instead of growing memory.
+STM_WRITE_QUEUE_SIZE = 32
+# fsync after this many rows, or whenever the queue drains (checkpoint)
+STM_FSYNC_EVERY = 10
+
+_stm_write_queue = queue.Queue(maxsize=STM_WRITE_QUEUE_SIZE)
+_stm_writer_thread = None
+_stm_writer_lock = threading.Lock()
+# Per session_id bookkeeping, so a session's flush only waits on and reports its own rows:
+# rows queued but not yet written, and rows the writer could not append (kept for retry)
+_stm_pending: Dict[Any, int] = {}
+_stm_failed_rows: Dict[Any, List[Tuple[str, Dict[str, Any]]]] = {}
+_stm_rows_changed = threading.Condition()
+
+def build_stm_event(
+    state: WorkflowState,
+    user_id: str,
+    session_id: str,
+    updated_completed_intents_in_flow: str,
+    updated_session_primary_skill: str
+) -> Dict[str, Any]:
     """
-    Assembles a structured event log from the final state of a workflow run.
+    Assembles a structured event log row from the final state of a workflow run.
     All data points are extracted directly from the provided state object.
 
     Args:
@@ -31,10 +55,9 @@ def short_term_memory_event_log(
         session_id (str): The unique ID for this conversation session.
         updated_completed_intents_in_flow (str): The list that serves as a memory of all the turn_intents.
         updated_session_primary_skill (str): The overarching "Core Skill" for the session.
-        stm_df (DataFrame): The STM DataFrame to which the new event log will be appended.
 
     Returns:
-        DataFrame: The updated STM DataFrame with the new event log row.
+        Dict: The new STM event row, keyed by STM_Data.csv column.
     """
 
     plan = state.get("execution_plan")
@@ -68,12 +91,131 @@ def short_term_memory_event_log(
         "crisis_level": state.get("crisis_level", "")
     }
 
-    new_row = pd.DataFrame([event_data])
-    stm_df = pd.concat([stm_df, new_row], ignore_index=True)
+    return event_data
+
+def _existing_header(path: str, fieldnames: List[str]) -> Optional[List[str]]:
+    """Returns the column order of a non-empty CSV file, checking it holds exactly `fieldnames`."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    if sorted(header) != sorted(fieldnames):
+        raise ValueError(f"{path} has columns {header}, expected {fieldnames}")
+    return header
 
-    return stm_df
+def _append_csv_row(path: str, fieldnames: List[str], row: Dict[str, Any], fsync: bool) -> None:
+    # Plain csv row write: no DataFrame is built for a single event. Rows follow the file's own
+    # header order, so files written with a different column order stay aligned.
+    header = _existing_header(path, fieldnames)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=header or fieldnames, lineterminator="\n")
+        if header is None:
+            writer.writeheader()
+        writer.writerow(row)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+def append_stm_event(event_data: Dict[str, Any], path: str = STM_DATA_PATH, fsync: bool = False) -> None:
+    """
+    Appends a single STM event row to the CSV log, so each turn writes one line
+    instead of re-serializing the whole table.
 
-def long_term_memory_event_log(
+    Args:
+        event_data (Dict): A row built by `build_stm_event`.
+        path (str): The STM CSV file; the header is written only when the file is new or empty.
+        fsync (bool): Whether to force the row to disk before returning.
+    """
+    _append_csv_row(path, STM_COLUMNS, event_data, fsync)
+
+def _stm_row_done(session_id: Any) -> None:
+    with _stm_rows_changed:
+        _stm_pending[session_id] -= 1
+        if not _stm_pending[session_id]:
+            del _stm_pending[session_id]
+        _stm_rows_changed.notify_all()
+
+def _stm_writer_loop() -> None:
+    unsynced = 0
+    while True:
+        path, event_data = _stm_write_queue.get()
+        try:
+            unsynced += 1
+            checkpoint = unsynced >= STM_FSYNC_EVERY or _stm_write_queue.empty()
+            append_stm_event(event_data, path, fsync=checkpoint)
+            if checkpoint:
+                unsynced = 0
+        except Exception:
+            logger.exception("Error writing STM event to %s; keeping it for retry", path)
+            with _stm_rows_changed:
+                _stm_failed_rows.setdefault(event_data.get("session_id"), []).append((path, event_data))
+        finally:
+            _stm_row_done(event_data.get("session_id"))
+            _stm_write_queue.task_done()
+
+def enqueue_stm_event(event_data: Dict[str, Any], path: str = STM_DATA_PATH) -> None:
+    """
+    Queues an STM event row for the background writer and returns immediately
+    (it only blocks while the queue is full).
+
+    Args:
+        event_data (Dict): A row built by `build_stm_event`.
+        path (str): The STM CSV file to append to.
+    """
+    global _stm_writer_thread
+    with _stm_writer_lock:
+        if _stm_writer_thread is None:
+            _stm_writer_thread = threading.Thread(target=_stm_writer_loop, name="stm-writer", daemon=True)
+            _stm_writer_thread.start()
+    session_id = event_data.get("session_id")
+    with _stm_rows_changed:
+        _stm_pending[session_id] = _stm_pending.get(session_id, 0) + 1
+    _stm_write_queue.put((path, event_data))
+
+def flush_stm_events(session_id: Optional[str] = None) -> None:
+    """
+    Blocks until the queued STM event rows have been written, then retries rows the
+    background writer failed to append.
+
+    Args:
+        session_id (str, optional): Only wait for and retry this session's rows; None flushes every session.
+
+    Raises:
+        RuntimeError: If some of those rows still cannot be written; they are kept for the next flush.
+    """
+    with _stm_rows_changed:
+        if session_id is None:
+            _stm_rows_changed.wait_for(lambda: not _stm_pending)
+            failed = [row for rows in _stm_failed_rows.values() for row in rows]
+            _stm_failed_rows.clear()
+        else:
+            _stm_rows_changed.wait_for(lambda: session_id not in _stm_pending)
+            failed = _stm_failed_rows.pop(session_id, [])
+
+    still_failed = 0
+    last_error = None
+    for path, event_data in failed:
+        try:
+            append_stm_event(event_data, path, fsync=True)
+        except Exception as e:
+            with _stm_rows_changed:
+                _stm_failed_rows.setdefault(event_data.get("session_id"), []).append((path, event_data))
+            still_failed += 1
+            last_error = e
+
+    if still_failed:
+        raise RuntimeError(f"{still_failed} STM event row(s) could not be written") from last_error
+
+def _flush_stm_events_at_exit() -> None:
+    try:
+        flush_stm_events()
+    except Exception:
+        logger.exception("STM event rows lost at exit")
+
+# Drain pending rows on interpreter exit (the writer is a daemon thread)
+atexit.register(_flush_stm_events_at_exit)
+
+def build_ltm_event(
     final_state: WorkflowState,
     initial_journey_list: List[str],
     initial_toolkit: Dict[str, List[str]],
@@ -82,11 +224,10 @@ def long_term_memory_event_log(
     conversation_history: List[str],
     user_id: str,
     session_id: str,
-    session_started_at: datetime,
-    ltm_df: pd.DataFrame()
-) -> pd.DataFrame():
+    session_started_at: datetime
+) -> Dict[str, Any]:
     """
-    Analyzes a session, consolidates LTM, and logs the new LTM state to a DataFrame,
+    Analyzes a session and consolidates LTM into a single LTM event row,
     using the exact logic provided.
 
     Args:
@@ -99,10 +240,9 @@ def long_term_memory_event_log(
         user_id (str): The unique ID of the user for this session.
         session_id (str): The unique ID for this conversation session.
         session_started_at (datetime): The timestamp when the session began.
-        ltm_df (DataFrame): The Pandas DataFrame to which the new LTM log will be appended.
 
     Returns:
-        DataFrame: The updated Pandas DataFrame with the new LTM log row.
+        Dict: The new LTM event row, keyed by LTM_Data.csv column.
     """
 
     session_ended_at = datetime.now()
@@ -142,7 +282,15 @@ def long_term_memory_event_log(
         "support_preference": analysis_result.support_preference
     }
 
-    new_ltm_row = pd.DataFrame([ltm_event_data])
-    ltm_df = pd.concat([ltm_df, new_ltm_row], ignore_index=True)
+    return ltm_event_data
 
-    return ltm_df
+def append_ltm_event(event_data: Dict[str, Any], path: str = LTM_DATA_PATH) -> None:
+    """
+    Appends a single LTM event row to the CSV log and forces it to disk, so ending
+    a session neither reads nor rewrites the rows of earlier sessions.
+
+    Args:
+        event_data (Dict): A row built by `build_ltm_event`.
+        path (str): The LTM CSV file; the header is written only when the file is new or empty.
+    """
+    _append_csv_row(path, LTM_COLUMNS, event_data, fsync=True)
@@ -9,11 +9,32 @@ import ast
 from typing import Dict, List, Optional
 from pathlib import Path
 
+# Column order of STM_Data.csv (one row per chat turn, see core.event_ingestion)
+STM_COLUMNS = [
+    'event_id', 'timestamp', 'user_id', 'session_id', 'event_status', 'error_details',
+    'session_topic', 'session_mood', 'focus_emotion', 'completed_intents_in_flow',
+    'session_primary_skill', 'frequent_agents', 'execution_plan', 'completed_steps',
+    'user_message', 'anaya_response', 'chat_history', 'crisis_flag', 'crisis_level'
+]
+
+# Column order of LTM_Data.csv (one row per session, see core.event_ingestion)
+LTM_COLUMNS = [
+    'user_id', 'session_id', 'session_started_at', 'session_ended_at',
+    'user_journey', 'guiding_intentions', 'personal_toolkit', 'memory_threads',
+    'somatic_focus', 'awareness_shift', 'support_preference'
+]
+
+# User_Data.csv columns needed to build a user's context
+USER_CONTEXT_DTYPES = {'user_id': str, 'first_name': str, 'user_profile': str}
+
+# LTM_Data.csv columns needed to build a user's context
+LTM_CONTEXT_COLUMNS = ['user_id', 'user_journey', 'guiding_intentions', 'memory_threads', 'personal_toolkit']
+
 
 def get_valid_user_ids() -> List[str]:
     """Get list of valid user IDs from User_Data.csv"""
     try:
-        user_df = pd.read_csv("./data/User_Data.csv")
+        user_df = pd.read_csv("./data/User_Data.csv", usecols=['user_id'], dtype={'user_id': str})
         return user_df['user_id'].tolist()
     except FileNotFoundError:
         print("Error: User_Data.csv not found in ./data/")
@@ -29,12 +50,12 @@ def validate_user_id(user_id: str) -> bool:
     return user_id in valid_users
 
 
-def load_ltm_data() -> pd.DataFrame:
-    """Load Long-Term Memory data from CSV"""
+def load_ltm_data(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load Long-Term Memory data from CSV, optionally parsing only `columns`"""
     ltm_path = "./data/LTM_Data.csv"
     try:
         if os.path.exists(ltm_path):
-            return pd.read_csv(ltm_path)
+            return pd.read_csv(ltm_path, usecols=columns, dtype=str)
         else:
             # Return empty DataFrame with expected columns
             return pd.DataFrame(columns=[
@@ -49,30 +70,6 @@ def load_ltm_data() -> pd.DataFrame:
         ])
 
 
-def load_stm_data() -> pd.DataFrame:
-    """Load Short-Term Memory data from CSV"""
-    stm_path = "./data/STM_Data.csv"
-    try:
-        if os.path.exists(stm_path):
-            return pd.read_csv(stm_path)
-        else:
-            # Return empty DataFrame with expected columns
-            return pd.DataFrame(columns=[
-                'session_id', 'user_id', 'session_started_at', 'session_ended_at',
-                'user_message', 'anaya_response', 'inferred_turn_intent', 'session_topic',
-                'session_mood', 'focus_emotion', 'completed_intents_in_flow',
-                'session_primary_skill', 'frequent_agents', 'tool_use', 'crisis_flag', 'crisis_level'
-            ])
-    except Exception as e:
-        print(f"Error loading STM data: {e}")
-        return pd.DataFrame(columns=[
-            'session_id', 'user_id', 'session_started_at', 'session_ended_at',
-            'user_message', 'anaya_response', 'inferred_turn_intent', 'session_topic',
-            'session_mood', 'focus_emotion', 'completed_intents_in_flow',
-            'session_primary_skill', 'frequent_agents', 'tool_use', 'crisis_flag', 'crisis_level'
-        ])
-
-
 def get_user_profile(user_id: str) -> Optional[Dict]:
     """
     Load user profile and LTM context for a given user_id
@@ -87,14 +84,18 @@ def get_user_profile(user_id: str) -> Optional[Dict]:
     """
     try:
         # Load user data
-        user_df = pd.read_csv("./data/User_Data.csv")
+        user_df = pd.read_csv(
+            "./data/User_Data.csv",
+            usecols=list(USER_CONTEXT_DTYPES),
+            dtype=USER_CONTEXT_DTYPES
+        )
         user_row = user_df[user_df['user_id'] == user_id]
         
         if user_row.empty:
             return None
         
-        # Load LTM data
-        ltm_df = load_ltm_data()
+        # Load LTM data (only the fields used below)
+        ltm_df = load_ltm_data(LTM_CONTEXT_COLUMNS)
         
         # Get latest LTM entry for this user
         user_ltm = ltm_df[ltm_df['user_id'] == user_id]
@@ -5,7 +5,6 @@ Main entry point for Anaya AI Wellness Assistant
 import os
 import sys
 import uuid
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
@@ -14,7 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from core.graph import app
 from core.utils import validate_user_id, get_user_profile, get_valid_user_ids
-from core.event_ingestion import short_term_memory_event_log, long_term_memory_event_log
+from core.event_ingestion import build_stm_event, enqueue_stm_event, flush_stm_events, build_ltm_event, append_ltm_event
 
 
 def main():
@@ -62,14 +61,9 @@ def main():
     session_id = uuid.uuid4()
     session_started_at = datetime.now()
     
-    # Load CSV data
-    try:
-        ltm_df = pd.read_csv("./data/LTM_Data.csv")
-        stm_df = pd.read_csv("./data/STM_Data.csv")
-    except FileNotFoundError as e:
-        print(f"\n Error loading data files: {e}")
-        print("Ensure LTM_Data.csv and STM_Data.csv exist in ./data/")
-        return
+    # STM rows logged during this session (the session_id is new, so the
+    # existing STM_Data.csv rows never belong to it and are not loaded)
+    session_stm = []
     
     # Initial LTM state
     initial_ltm_state = {
@@ -84,6 +78,8 @@ def main():
     # Initial greeting
     initial_greeting = f"> Anaya: Hi {initial_ltm_state['user_name']}! How can I support you today?"
     conversation_history = [initial_greeting.replace("> Anaya: ", "Anaya: ")]
+    # Running transcript, extended per turn instead of re-joining conversation_history
+    chat_history = conversation_history[0]
     
     print(f"\n{initial_greeting}")
     print("-" * 50)
@@ -104,6 +100,12 @@ def main():
             print("--- Saving Long-Term Memory ---")
             print("="*50)
             
+            # Finish writing this session's STM rows
+            try:
+                flush_stm_events(session_id)
+            except Exception as e:
+                print(f"\n STM Error: {e}")
+            
             print(f" Session Summary:")
             print(f"  Messages: {len(conversation_history)}")
             print(f"  Duration: {(datetime.now() - session_started_at).seconds // 60} minutes")
@@ -111,7 +113,7 @@ def main():
             try:
                 print("\n Analyzing conversation for LTM...")
                 
-                new_ltm_df = long_term_memory_event_log(
+                ltm_event = build_ltm_event(
                     final_state=final_state,
                     initial_journey_list=user_context['user_journey'],
                     initial_toolkit=user_context['personal_toolkit'],
@@ -120,18 +122,14 @@ def main():
                     conversation_history=conversation_history,
                     user_id=user_id,
                     session_id=session_id,
-                    session_started_at=session_started_at,
-                    ltm_df=ltm_df
+                    session_started_at=session_started_at
 )
                 
-                if len(new_ltm_df) > len(ltm_df):
-                    latest_ltm = new_ltm_df.iloc[-1]
-                    print("\n LTM Updated Successfully!")
-                    print(f"  Journey: {str(latest_ltm['user_journey'])[:100]}...")
-                else:
-                    print("\nℹ No new LTM data generated")
+                print("\n LTM Updated Successfully!")
+                print(f"  Journey: {str(ltm_event['user_journey'])[:100]}...")
                 
-                new_ltm_df.to_csv("./data/LTM_Data.csv", index=False)
+                # Append this session's row instead of rewriting the whole file
+                append_ltm_event(ltm_event)
                 print("\n Saved to ./data/LTM_Data.csv")
                 
             except Exception as e:
@@ -147,19 +145,17 @@ def main():
             continue
         
         # Update STM tracking from previous turn
-        if len(conversation_history) > 1 and not stm_df.empty:
+        if len(conversation_history) > 1 and session_stm:
             try:
-                session_stm = stm_df[stm_df['session_id'] == str(session_id)]
-                if not session_stm.empty:
-                    import ast
-                    updated_completed_intents = ast.literal_eval(
-                        session_stm['completed_intents_in_flow'].values[-1]
-                    )
-                    frequent_agents = ast.literal_eval(
-                        session_stm['frequent_agents'].values[0]
-                    )
-                    if frequent_agents:
-                        updated_session_primary_skill = frequent_agents[0]
+                import ast
+                updated_completed_intents = ast.literal_eval(
+                    session_stm[-1]['completed_intents_in_flow']
+                )
+                frequent_agents = ast.literal_eval(
+                    session_stm[0]['frequent_agents']
+                )
+                if frequent_agents:
+                    updated_session_primary_skill = frequent_agents[0]
             except Exception as e:
                 print(f" Warning: Could not load STM history: {e}")
         
@@ -167,7 +163,7 @@ def main():
         turn_state = {
             "user_id": user_id,
             "user_message": user_message,
-            "chat_history": "\n".join(conversation_history),
+            "chat_history": chat_history,
             **initial_ltm_state,
             "session_topic": "",
             "session_mood": "",
@@ -196,6 +192,7 @@ def main():
             # Update conversation history
             conversation_history.append(f"User: {user_message}")
             conversation_history.append(f"Anaya: {anaya_response}")
+            chat_history += f"\nUser: {user_message}\nAnaya: {anaya_response}"
             
             # Update completed intents
             if final_state.get("inferred_turn_intent"):
@@ -207,12 +204,13 @@ def main():
                 if not updated_session_primary_skill and len(frequent_agents) > 0:
                     updated_session_primary_skill = frequent_agents[0]
             
-            # Log STM to CSV
-            stm_df = short_term_memory_event_log(
+            # Log STM to CSV (this turn's row is appended by the background writer)
+            stm_event = build_stm_event(
                 final_state, user_id, session_id, 
-                updated_completed_intents, updated_session_primary_skill, stm_df
+                updated_completed_intents, updated_session_primary_skill
             )
-            stm_df.to_csv("./data/STM_Data.csv", index=False)
+            enqueue_stm_event(stm_event)
+            session_stm.append(stm_event)
             
             # Update LTM state for next turn
             initial_ltm_state.update({
@@ -4,37 +4,103 @@ Handles document ingestion and retrieval
 """
 
 import os
+import hashlib
+import functools
+import threading
 from pathlib import Path
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from tqdm import tqdm
 
 from langchain_community.document_loaders import (
     PyPDFLoader,
     Docx2txtLoader,
-    TextLoader,
-    DirectoryLoader
+    TextLoader
 )
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 load_dotenv()
 
 # Configuration
 KNOWLEDGE_BASE_DIR = "./rag/knowledge_base"
 VECTOR_DB_PATH = "./rag/anaya_knowledge_db"
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 100
+# Chunk sizes are in tokens (cl100k_base), roughly 4 characters each
+CHUNK_ENCODING = "cl100k_base"
+CHUNK_SIZE = 250
+CHUNK_OVERLAP = 25
 TOP_K_RESULTS = 6
+QUERY_EMBED_CACHE_SIZE = 1024
+EMBED_BATCH_SIZE = 100
+EMBED_MAX_WORKERS = 8
+LOAD_MAX_WORKERS = 8
+
+# Supported knowledge base file types
+LOADERS_BY_SUFFIX = {
+    ".pdf": PyPDFLoader,
+    ".docx": Docx2txtLoader,
+    ".txt": TextLoader
+}
 
 # Embedding model
+# One module-level client: its (default gRPC) HTTP/2 channel is reused by every ingest
+# batch and retriever query.
 embed_model = GoogleGenerativeAIEmbeddings(
     model="models/text-embedding-004",   
     google_api_key=os.getenv("GOOGLE_API_KEY")
 )
 
 
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper that memoizes query vectors, so repeated queries skip the embedding API"""
+    
+    def __init__(self, embeddings: Embeddings, maxsize: int = QUERY_EMBED_CACHE_SIZE):
+        self.embeddings = embeddings
+        self._embed_query_cached = functools.lru_cache(maxsize=maxsize)(self._embed_query_tuple)
+    
+    def _embed_query_tuple(self, text: str):
+        # Stored as a tuple so a caller cannot mutate the cached vector
+        return tuple(self.embeddings.embed_query(text))
+    
+    def embed_query(self, text: str) -> List[float]:
+        return list(self._embed_query_cached(text))
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+
+# Used for queries (retrieval, factual cache lookups)
+query_embed_model = CachedQueryEmbeddings(embed_model)
+
+
+def find_document_files(folder_path: str) -> List[str]:
+    """Recursively collect supported files in a single directory walk (hidden entries skipped)"""
+    paths = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                paths.extend(find_document_files(entry.path))
+            elif os.path.splitext(entry.name)[1].lower() in LOADERS_BY_SUFFIX:
+                paths.append(entry.path)
+    return paths
+
+
+def load_document_file(path: str) -> List[Document]:
+    """Load one file with the loader for its type"""
+    loader_cls = LOADERS_BY_SUFFIX[os.path.splitext(path)[1].lower()]
+    try:
+        return loader_cls(path).load()
+    except Exception as e:
+        print(f"Warning: Error loading {path}: {e}")
+        return []
+
+
 def load_documents_from_folder(folder_path: str) -> List[Document]:
     """Load all documents from knowledge base folder"""
     documents = []
@@ -42,49 +108,22 @@ def load_documents_from_folder(folder_path: str) -> List[Document]:
     
     print(f"\n Scanning {folder_path} for documents...")
     
-    # Load PDFs
-    try:
-        pdf_loader = DirectoryLoader(
-            folder_path,
-            glob="**/*.pdf",
-            loader_cls=PyPDFLoader,
-            show_progress=True
-        )
-        documents.extend(pdf_loader.load())
-    except Exception as e:
-        print(f"Warning: Error loading PDFs: {e}")
-    
-    # Load DOCX files
-    try:
-        docx_loader = DirectoryLoader(
-            folder_path,
-            glob="**/*.docx",
-            loader_cls=Docx2txtLoader,
-            show_progress=True
-        )
-        documents.extend(docx_loader.load())
-    except Exception as e:
-        print(f"Warning: Error loading DOCX files: {e}")
+    paths = sorted(find_document_files(folder_path))
+    print(f" Found {len(paths)} files")
     
-    # Load TXT files
-    try:
-        txt_loader = DirectoryLoader(
-            folder_path,
-            glob="**/*.txt",
-            loader_cls=TextLoader,
-            show_progress=True
-        )
-        documents.extend(txt_loader.load())
-    except Exception as e:
-        print(f"Warning: Error loading TXT files: {e}")
+    # Parse files concurrently (file I/O and PDF parsing), keeping the scan order
+    with ThreadPoolExecutor(max_workers=LOAD_MAX_WORKERS) as executor:
+        for file_documents in tqdm(executor.map(load_document_file, paths), total=len(paths)):
+            documents.extend(file_documents)
     
     print(f" Loaded {len(documents)} document chunks")
     return documents
 
 
 def chunk_documents(documents: List[Document]) -> List[Document]:
-    """Split documents into smaller, overlapping chunks"""
-    text_splitter = RecursiveCharacterTextSplitter(
+    """Split documents into smaller, overlapping chunks, measured in tokens"""
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name=CHUNK_ENCODING,
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
         separators=["\n\n", "\n", ". ", " ", ""]
@@ -95,48 +134,110 @@ def chunk_documents(documents: List[Document]) -> List[Document]:
     return chunks
 
 
+def chunk_id(chunk: Document) -> str:
+    """Content hash used as the vector DB id, so an unchanged chunk keeps its id across ingests"""
+    return hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+
+
+def embed_and_add_chunks(vectorstore: Chroma, ids: List[str], chunks: List[Document]):
+    """
+    Add chunks to the vector store in batches on a thread pool.
+    Each batch goes through the store's public add_texts (which embeds it with the store's
+    embedding model); embedding is bound by API round-trips, so batches run concurrently.
+    """
+    batches = [
+        (ids[i:i + EMBED_BATCH_SIZE], chunks[i:i + EMBED_BATCH_SIZE])
+        for i in range(0, len(ids), EMBED_BATCH_SIZE)
+    ]
+    
+    def add_batch(batch):
+        batch_ids, batch_chunks = batch
+        return vectorstore.add_texts(
+            texts=[chunk.page_content for chunk in batch_chunks],
+            metadatas=[chunk.metadata for chunk in batch_chunks],
+            ids=batch_ids
+        )
+    
+    with ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS) as executor:
+        # Consume the results so a failed batch raises here
+        for _ in executor.map(add_batch, batches):
+            pass
+
+
+# Retriever shared by all queries in this process (the Chroma client and index stay open)
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
 def create_or_update_vectordb(documents: List[Document]):
-    """Create or update the vector database"""
+    """
+    Sync the vector database with the given chunks.
+    Only chunks not already stored are embedded; chunks that no longer exist are removed.
+    """
+    global _retriever
     if not documents:
         print(" No documents to index!")
         return
     
     print(f"\n🔧 Creating/updating vector database at {VECTOR_DB_PATH}...")
     
-    # Remove old database if exists
-    if os.path.exists(VECTOR_DB_PATH):
-        print(" Removing old database...")
-        import shutil
-        shutil.rmtree(VECTOR_DB_PATH)
-    
-    # Create new vector store
-    vectorstore = Chroma.from_documents(
-        documents=documents,
-        embedding=embed_model,
+    vectorstore = Chroma(
         persist_directory=VECTOR_DB_PATH,
+        embedding_function=embed_model,
         collection_name="anaya-knowledge"
     )
     
-    print(f" Vector database created with {len(documents)} chunks!")
+    # Identical chunks share an id, so keep one of each
+    chunks_by_id = {}
+    for chunk in documents:
+        chunks_by_id.setdefault(chunk_id(chunk), chunk)
+    
+    existing_ids = set(vectorstore.get(include=[])["ids"])
+    new_ids = [i for i in chunks_by_id if i not in existing_ids]
+    stale_ids = list(existing_ids - chunks_by_id.keys())
+    
+    # Remove chunks from edited or deleted documents
+    if stale_ids:
+        print(f" Removing {len(stale_ids)} outdated chunks...")
+        vectorstore.delete(ids=stale_ids)
+    
+    # Embed only new chunks
+    if new_ids:
+        print(f" Embedding {len(new_ids)} new chunks ({len(chunks_by_id) - len(new_ids)} unchanged)...")
+        embed_and_add_chunks(vectorstore, new_ids, [chunks_by_id[i] for i in new_ids])
+    
+    # Reopen the retriever on next use so it sees the updated collection
+    with _retriever_lock:
+        _retriever = None
+    
+    print(f" Vector database up to date with {len(chunks_by_id)} chunks!")
     return vectorstore
 
 
 def get_retriever():
-    """Get retriever for querying the knowledge base"""
-    if not os.path.exists(VECTOR_DB_PATH):
-        print(" No vector database found! Run: python -m rag.ingest_documents")
-        return None
-    
-    vectorstore = Chroma(
-        persist_directory=VECTOR_DB_PATH,
-        embedding_function=embed_model,
-        collection_name="anaya-knowledge"
-    )
+    """Get retriever for querying the knowledge base (opened once per process)"""
+    global _retriever
+    if _retriever is not None:
+        return _retriever
     
-    return vectorstore.as_retriever(
-        search_type="mmr",
-        search_kwargs={"k": TOP_K_RESULTS, "fetch_k": 20}
-    )
+    with _retriever_lock:
+        if _retriever is None:
+            if not os.path.exists(VECTOR_DB_PATH):
+                print(" No vector database found! Run: python -m rag.ingest_documents")
+                return None
+            
+            vectorstore = Chroma(
+                persist_directory=VECTOR_DB_PATH,
+                embedding_function=query_embed_model,
+                collection_name="anaya-knowledge"
+            )
+            
+            # Plain nearest-neighbour search on Chroma's HNSW index (no MMR re-ranking per query)
+            _retriever = vectorstore.as_retriever(
+                search_type="similarity",
+                search_kwargs={"k": TOP_K_RESULTS}
+            )
+        return _retriever
 
 
 def ingest_all_documents():
@@ -1,650 +1,769 @@
-"""
-streamlit_app.py
-Streamlit UI for Anaya - AI Wellness Assistant for Canadian Farmers
-Updated to work with core/ structure
-"""
-
-import os
-import sys
-from pathlib import Path
-import streamlit as st
-from dotenv import load_dotenv
-from datetime import datetime
-import uuid
-import pandas as pd
-
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent))
-
-# Load environment variables FIRST
-load_dotenv()
-
-# Import from core (updated paths)
-from core.graph import app
-from core.utils import (
-    validate_user_id, 
-    get_valid_user_ids, 
-    get_user_profile
-)
-from core.event_ingestion import short_term_memory_event_log, long_term_memory_event_log
-
-# Helper functions for data loading
-def load_stm_data():
-    """Load Short-Term Memory data"""
-    try:
-        return pd.read_csv("./data/STM_Data.csv")
-    except FileNotFoundError:
-        return pd.DataFrame()
-
-def load_ltm_data():
-    """Load Long-Term Memory data"""
-    try:
-        return pd.read_csv("./data/LTM_Data.csv")
-    except FileNotFoundError:
-        return pd.DataFrame()
-
-# ========== PAGE CONFIG ==========
-st.set_page_config(
-    page_title="Anaya | Farm Wellness Assistant",
-    page_icon="🌾",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# ========== CUSTOM CSS ==========
-st.markdown("""
-<style>
-    /* Main background */
-    .main {
-        background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%);
-    }
-    
-    /* Header styling */
-    .main-header {
-        background: linear-gradient(90deg, #2e7d32 0%, #388e3c 100%);
-        padding: 30px;
-        border-radius: 15px;
-        margin-bottom: 30px;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    }
-    
-    .main-header h1 {
-        color: white;
-        margin: 0;
-        font-size: 2.5rem;
-        font-weight: 700;
-    }
-    
-    .main-header p {
-        color: #c8e6c9;
-        margin: 10px 0 0 0;
-        font-size: 1.1rem;
-    }
-    
-    /* Chat container */
-    .chat-container {
-        background: white;
-        border-radius: 15px;
-        padding: 25px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        margin-bottom: 20px;
-    }
-    
-    /* User message bubble */
-    .user-message {
-        background: linear-gradient(135deg, #4caf50 0%, #66bb6a 100%);
-        color: white;
-        padding: 15px 20px;
-        border-radius: 20px 20px 5px 20px;
-        margin: 10px 0;
-        max-width: 80%;
-        float: right;
-        clear: both;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-    }
-    
-    /* Assistant message bubble */
-    .assistant-message {
-        background: #f5f5f5;
-        color: #333;
-        padding: 15px 20px;
-        border-radius: 20px 20px 20px 5px;
-        margin: 10px 0;
-        max-width: 80%;
-        float: left;
-        clear: both;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-    }
-    
-    /* Sidebar styling */
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #1b5e20 0%, #2e7d32 100%);
-    }
-    
-    /* Input box */
-    .stTextInput input {
-        border-radius: 25px;
-        border: 2px solid #4caf50;
-        padding: 12px 20px;
-    }
-    
-    /* Buttons */
-    .stButton button {
-        border-radius: 25px;
-        background: linear-gradient(90deg, #4caf50 0%, #66bb6a 100%);
-        color: white;
-        font-weight: 600;
-        border: none;
-        padding: 12px 30px;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton button:hover {
-        background: linear-gradient(90deg, #388e3c 0%, #4caf50 100%);
-        box-shadow: 0 4px 12px rgba(76,175,80,0.4);
-    }
-    
-    /* Crisis alert */
-    .crisis-alert {
-        background-color: #ffebee;
-        border-left: 5px solid #f44336;
-        padding: 15px;
-        border-radius: 5px;
-        margin: 10px 0;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# ========== SESSION STATE INITIALIZATION ==========
-def init_session_state():
-    """Initialize session state variables"""
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
-    if 'user_id' not in st.session_state:
-        st.session_state.user_id = None
-    if 'user_context' not in st.session_state:
-        st.session_state.user_context = None
-    if 'initial_user_context' not in st.session_state:
-        st.session_state.initial_user_context = None
-    if 'session_id' not in st.session_state:
-        st.session_state.session_id = str(uuid.uuid4())
-    if 'session_started_at' not in st.session_state:
-        st.session_state.session_started_at = datetime.now()
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
-    if 'conversation_history' not in st.session_state:
-        st.session_state.conversation_history = []
-    if 'conversation_started' not in st.session_state:
-        st.session_state.conversation_started = False
-    if 'message_count' not in st.session_state:
-        st.session_state.message_count = 0
-    if 'agent_logs' not in st.session_state:
-        st.session_state.agent_logs = []
-    if 'final_state' not in st.session_state:
-        st.session_state.final_state = {}
-    if 'completed_intents' not in st.session_state:
-        st.session_state.completed_intents = []
-    if 'session_primary_skill' not in st.session_state:
-        st.session_state.session_primary_skill = ""
-    if 'processing' not in st.session_state:
-        st.session_state.processing = False
-
-# ========== LTM SAVE HELPER ==========
-def save_ltm_on_session_end():
-    """Save LTM when session ends (logout or new conversation)"""
-    if st.session_state.message_count > 0:
-        try:
-            ltm_df = load_ltm_data()
-            
-            # Final state (what was updated during conversation)
-            final_state = st.session_state.final_state
-            
-            # Initial state (from User_Data.csv when user logged in)
-            initial_context = st.session_state.initial_user_context or {}
-            
-            new_ltm_df = long_term_memory_event_log(
-                final_state=final_state,
-                initial_journey_list=initial_context.get('user_journey', []),
-                initial_toolkit=initial_context.get('personal_toolkit', {}),
-                initial_intentions=initial_context.get('guiding_intentions', []),
-                initial_threads=initial_context.get('memory_threads', {}),
-                conversation_history=st.session_state.conversation_history,
-                user_id=st.session_state.user_id,
-                session_id=st.session_state.session_id,
-                session_started_at=st.session_state.session_started_at,
-                ltm_df=ltm_df
-            )
-            
-            new_ltm_df.to_csv("./data/LTM_Data.csv", index=False)
-            print(f" LTM saved for session {st.session_state.session_id}")
-            return True
-        except Exception as e:
-            print(f" Error saving LTM: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-    return False
-
-# ========== LOGIN PAGE ==========
-def show_login_page():
-    """Display login page with CSV user selection"""
-    st.markdown("""
-        <div class="main-header">
-            <h1>🌾 Welcome to Anaya</h1>
-            <p>Your AI Wellness Companion for Farm Life</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("### 👤 Enter Your Details")
-    
-    # Get valid users from CSV
-    valid_users = get_valid_user_ids()
-    
-    if not valid_users:
-        st.error(" No users found in User_Data.csv. Please add users to ./data/User_Data.csv to continue.")
-        st.stop()
-    
-    # User selection
-    selected_user = st.selectbox(
-        "Select your User ID:",
-        options=[""] + valid_users,
-        format_func=lambda x: "-- Select a User --" if x == "" else x
-    )
-    
-    # Show user info if selected
-    if selected_user:
-        try:
-            user_df = pd.read_csv("./data/User_Data.csv")
-            user_info = user_df[user_df['user_id'] == selected_user].iloc[0]
-            
-            st.info(f"""
-            **Name:** {user_info['first_name']} {user_info['last_name']}  
-            **Location:** {user_info['city']}, {user_info['province']}  
-            **Profile:** {user_info['user_profile']}
-            """)
-        except Exception as e:
-            st.error(f"Error loading user info: {e}")
-    
-    # Login button
-    if st.button("🌾 Start Session", disabled=not selected_user):
-        if selected_user and validate_user_id(selected_user):
-            # Load user profile
-            user_context = get_user_profile(selected_user)
-            
-            if user_context:
-                st.session_state.user_id = selected_user
-                st.session_state.user_context = user_context
-                st.session_state.initial_user_context = user_context.copy()
-                st.session_state.logged_in = True
-                st.session_state.session_id = str(uuid.uuid4())
-                st.session_state.session_started_at = datetime.now()
-                st.rerun()
-            else:
-                st.error(" Could not load user profile. Please try again.")
-        else:
-            st.error(" Invalid user ID")
-    
-    # Information section
-    st.markdown("---")
-    st.markdown("### 🌾 About Anaya")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        **What Anaya Offers:**
-        - 💚 Emotional support and validation
-        - 🧠 Practical coping strategies  
-        - 🌾 Farm-specific wellness guidance
-        - 🗣️ Compassionate, judgment-free space
-        """)
-    
-    with col2:
-        st.markdown("""
-        **How It Works:**
-        1. Select your user profile
-        2. Share what's on your mind
-        3. Get personalized support
-        4. Build your wellness journey
-        """)
-    
-    st.markdown("---")
-    
-    # Disclaimer
-    with st.expander("⚠️ Important Notice"):
-        st.markdown("""
-        Anaya provides **emotional support and wellness guidance** 
-        but is **NOT a substitute** for professional medical care, 
-        therapy, or crisis intervention.
-        
-        **Always consult qualified healthcare professionals** 
-        for diagnosis, treatment, or emergencies.
-        
-        **Crisis Resources (Canada):**
-        - Crisis Text Line: Text HOME to 741741
-        - National Suicide Prevention: Call or text 988
-        - Talk Suicide Canada: 1-833-456-4566
-        - Emergency: Call 911
-        """)
-    
-    st.markdown("---")
-    st.markdown("_Built with ❤️ for Canadian Farmers_")
-    st.markdown("_Version 1.0_")
-
-# ========== SIDEBAR ==========
-def render_sidebar():
-    """Render sidebar with session info and controls"""
-    with st.sidebar:
-        st.markdown("## 🌾 Anaya AI")
-        st.markdown("---")
-        
-        # User info
-        if st.session_state.user_context:
-            st.success(f"**Logged in as:**")
-            st.markdown(f"👤 **{st.session_state.user_context['user_name']}**")
-            st.markdown(f"🆔 `{st.session_state.user_id}`")
-        
-        st.markdown("---")
-        
-        # Session info
-        st.markdown("### 📊 Session Info")
-        
-        if st.session_state.session_started_at:
-            duration = datetime.now() - st.session_state.session_started_at
-            st.markdown(f"**Duration:** {duration.seconds // 60} min")
-        
-        st.markdown(f"**Messages:** {st.session_state.message_count}")
-        st.markdown(f"**Session ID:** `{st.session_state.session_id[:8]}...`")
-        
-        st.markdown("---")
-        
-        # Session controls
-        st.markdown("### ⚙️ Session Controls")
-        
-        if st.button("🔄 New Conversation", use_container_width=True):
-            # Save LTM before clearing
-            save_ltm_on_session_end()
-            
-            # Reset conversation state
-            st.session_state.messages = []
-            st.session_state.conversation_history = []
-            st.session_state.conversation_started = False
-            st.session_state.message_count = 0
-            st.session_state.agent_logs = []
-            st.session_state.session_id = str(uuid.uuid4())
-            st.session_state.session_started_at = datetime.now()
-            st.session_state.completed_intents = []
-            st.session_state.session_primary_skill = ""
-            
-            # Reload user context
-            st.session_state.user_context = get_user_profile(st.session_state.user_id)
-            st.session_state.initial_user_context = st.session_state.user_context.copy()
-            
-            st.rerun()
-        
-        if st.button("🚪 Logout", use_container_width=True):
-            # Save LTM before logout
-            save_ltm_on_session_end()
-            
-            # Clear all session state
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            
-            st.rerun()
-        
-        st.markdown("---")
-        
-        # User profile summary
-        st.markdown("### 📋 Your Profile")
-        
-        if st.session_state.user_context:
-            with st.expander("View Details"):
-                st.markdown(f"**Profile:**")
-                st.markdown(st.session_state.user_context['user_profile'])
-                
-                if st.session_state.user_context.get('user_journey'):
-                    st.markdown(f"**Journey Entries:** {len(st.session_state.user_context['user_journey'])}")
-                
-                if st.session_state.user_context.get('guiding_intentions'):
-                    intentions = [i for i in st.session_state.user_context['guiding_intentions'] if i]
-                    st.markdown(f"**Guiding Intentions:** {len(intentions)}")
-                
-                toolkit = st.session_state.user_context.get('personal_toolkit', {})
-                helpful = len(toolkit.get('user_found_helpful', []))
-                st.markdown(f"**Helpful Tools:** {helpful}")
-        
-        st.markdown("---")
-        
-        # Disclaimer
-        with st.expander("⚠️ Important Notice"):
-            st.markdown("""
-            Anaya provides **emotional support and wellness guidance** 
-            but is **NOT a substitute** for professional medical care, 
-            therapy, or crisis intervention.
-            
-            **Always consult qualified healthcare professionals** 
-            for diagnosis, treatment, or emergencies.
-            """)
-        
-        st.markdown("---")
-        st.markdown("_Built for Canadian Farmers_")
-        st.markdown("_Version 1.0_")
-
-# ========== CHAT INTERFACE ==========
-def render_chat_interface():
-    """Main chat interface"""
-    
-    # Check API key
-    if not os.getenv("GOOGLE_API_KEY"):
-        st.error(" **Error:** GOOGLE_API_KEY not found. Please add it to your .env file.")
-        st.stop()
-    
-    # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🌾 Chat with Anaya</h1>
-        <p>Share what's on your mind - I'm here to listen and support you</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Chat container
-    chat_container = st.container()
-    
-    with chat_container:
-        # Welcome message (only show once)
-        if not st.session_state.conversation_started:
-            with st.chat_message("assistant", avatar="🌱"):
-                st.markdown(f"""
-                **Hi {st.session_state.user_context['user_name']}! I'm Anaya, your wellness companion.**
-                
-                I'm here to provide:
-                - 💚 Emotional support and validation
-                - 🧠 Practical coping strategies
-                - 🌾 Farm-specific wellness guidance
-                - 🗣️ A compassionate, judgment-free space
-                
-                **How are you feeling today?**
-                """)
-            st.session_state.conversation_started = True
-        
-        # Display conversation history
-        for i, msg in enumerate(st.session_state.messages):
-            with st.chat_message(msg["role"], avatar="🌱" if msg["role"] == "assistant" else "👤"):
-                st.markdown(msg["content"])
-                if "timestamp" in msg:
-                    st.caption(msg["timestamp"])
-                
-                # Show agent logs for debugging (optional)
-                if msg["role"] == "assistant" and i < len(st.session_state.agent_logs):
-                    log = st.session_state.agent_logs[i]
-                    
-                    # Show crisis alert if detected
-                    if log.get('crisis_flag'):
-                        st.markdown(f"""
-                        <div class="crisis-alert">
-                            <strong> Crisis Alert Detected</strong><br>
-                            Level: {log.get('crisis_level', 'Unknown')}
-                        </div>
-                        """, unsafe_allow_html=True)
-    
-    # Chat input
-    if prompt := st.chat_input("Type your message here...", key="user_input"):
-        # Add user message to display
-        st.session_state.messages.append({
-            "role": "user",
-            "content": prompt,
-            "timestamp": datetime.now().strftime("%I:%M %p")
-        })
-        
-        # Update conversation history immediately
-        st.session_state.conversation_history.append(f"User: {prompt}")
-        
-        # Set processing flag
-        st.session_state.processing = True
-        
-        # Rerun to show user message before processing
-        st.rerun()
-    
-    # Process the last message if it's from user and hasn't been responded to
-    if (st.session_state.processing and 
-        st.session_state.messages and 
-        st.session_state.messages[-1]["role"] == "user"):
-        
-        prompt = st.session_state.messages[-1]["content"]
-        
-        # Reset processing flag immediately to prevent reprocessing
-        st.session_state.processing = False
-        
-        # Process with agent
-        with st.spinner("🌾 Anaya is thinking..."):
-            try:
-                # Prepare state for workflow
-                turn_state = {
-                    "user_id": st.session_state.user_id,
-                    "user_message": prompt,
-                    "chat_history": "\n".join(st.session_state.conversation_history),
-                    "user_name": st.session_state.user_context['user_name'],
-                    "user_profile": st.session_state.user_context['user_profile'],
-                    "guiding_intentions": st.session_state.user_context['guiding_intentions'],
-                    "user_journey": st.session_state.user_context['user_journey'],
-                    "memory_thread": st.session_state.user_context['memory_threads'],
-                    "personal_toolkit": st.session_state.user_context['personal_toolkit'],
-                    "session_topic": "",
-                    "session_mood": "",
-                    "focus_emotion": "",
-                    "crisis_flag": False,
-                    "crisis_level": None,
-                    "execution_plan": [],
-                    "completed_steps": [],
-                    "inferred_turn_intent": "",
-                    "completed_intents_in_flow": st.session_state.completed_intents,
-                    "session_primary_skill": st.session_state.session_primary_skill,
-                    "frequent_agents": [],
-                    "final_response": ""
-                }
-                
-                # Run workflow
-                result = app.invoke(turn_state)
-                st.session_state.final_state = result  # Store for LTM logging later
-                
-                response = result.get("final_response", "I'm sorry, I encountered an issue.")
-                
-                # Add agent log
-                agent_log = {
-                    "pipeline": "Success",
-                    "focus_emotion": result.get("focus_emotion", "N/A"),
-                    "session_topic": result.get("session_topic", "N/A"),
-                    "session_mood": result.get("session_mood", "N/A"),
-                    "crisis_flag": result.get("crisis_flag", False),
-                    "crisis_level": result.get("crisis_level", None)
-                }
-                st.session_state.agent_logs.append(agent_log)
-                
-                # Display response
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response,
-                    "timestamp": datetime.now().strftime("%I:%M %p")
-                })
-                
-                st.session_state.message_count += 1
-                
-                # Update conversation history with response only
-                st.session_state.conversation_history.append(f"Anaya: {response}")
-                
-                # Update completed intents
-                if result.get("inferred_turn_intent"):
-                    st.session_state.completed_intents.append(result["inferred_turn_intent"])
-                
-                # Update session primary skill
-                if result.get("frequent_agents"):
-                    st.session_state.session_primary_skill = result["frequent_agents"][0] if result["frequent_agents"] else ""
-                
-                # Save to STM
-                stm_df = load_stm_data()
-                new_stm = short_term_memory_event_log(
-                    result,
-                    st.session_state.user_id,
-                    st.session_state.session_id,
-                    st.session_state.completed_intents,
-                    st.session_state.session_primary_skill,
-                    stm_df
-                )
-                new_stm.to_csv("./data/STM_Data.csv", index=False)
-                
-                # Update user context with new LTM state
-                st.session_state.user_context['user_journey'] = result.get(
-                    'user_journey', 
-                    st.session_state.user_context['user_journey']
-                )
-                st.session_state.user_context['personal_toolkit'] = result.get(
-                    'personal_toolkit',
-                    st.session_state.user_context['personal_toolkit']
-                )
-                st.session_state.user_context['guiding_intentions'] = result.get(
-                    'guiding_intentions',
-                    st.session_state.user_context['guiding_intentions']
-                )
-                st.session_state.user_context['memory_threads'] = result.get(
-                    'memory_thread',
-                    st.session_state.user_context['memory_threads']
-                )
-                
-                # Rerun to display new messages
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f" Error: {str(e)}")
-                import traceback
-                st.code(traceback.format_exc())
-                
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": "I apologize, but I encountered an error. Please try again.",
-                    "timestamp": datetime.now().strftime("%I:%M %p")
-                })
-                
-                # Add empty log for failed responses
-                st.session_state.agent_logs.append({
-                    "pipeline": "Error occurred",
-                    "focus_emotion": "N/A",
-                    "session_topic": "N/A",
-                    "session_mood": "N/A",
-                    "crisis_flag": False,
-                    "crisis_level": None
-                })
-                st.rerun()
-
-# ========== MAIN APP ==========
-def main():
-    """Main application entry point"""
-    init_session_state()
-    
-    if not st.session_state.logged_in:
-        show_login_page()
-    else:
-        render_sidebar()
-        render_chat_interface()
-
-if __name__ == "__main__":
+"""
+streamlit_app.py
+Streamlit UI for Anaya - AI Wellness Assistant for Canadian Farmers
+Updated to work with core/ structure
+"""
+
+import os
+import re
+import sys
+import html
+import logging
+import traceback
+from pathlib import Path
+import streamlit as st
+from dotenv import load_dotenv
+from datetime import datetime
+from time import monotonic
+import uuid
+import pandas as pd
+from types import MappingProxyType
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Load environment variables FIRST
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Show full tracebacks in the UI (ANAYA_DEBUG=true); otherwise they only go to the log
+DEBUG_MODE = os.getenv("ANAYA_DEBUG", "false").lower() == "true"
+
+# Import from core (updated paths); core.graph and core.event_ingestion are
+# imported where first needed so the login page does not pay for them
+from core.utils import (
+    get_valid_user_ids, 
+    get_user_profile
+)
+
+@st.cache_resource(show_spinner=False)
+def get_app():
+    """Build the LangGraph workflow once per process, on the first chat turn"""
+    from core.graph import app
+    return app
+
+# Progress label shown once a workflow node finishes, i.e. while the next one runs (node names from core/graph.py)
+WORKFLOW_STEP_LABELS = {
+    "short_term_memory": "🌾 Planning a response...",
+    "planner": "🌾 Gathering support...",
+    "execute_tools": "🌾 Putting it together...",
+    "synthesis": "🌾 Anaya is ready"
+}
+
+# Per-turn workflow fields that always start empty (copied for each turn; the
+# list-valued ones are filled in fresh so no turn shares a list with another)
+_TURN_STATE_TEMPLATE = {
+    "session_topic": "",
+    "session_mood": "",
+    "focus_emotion": "",
+    "crisis_flag": False,
+    "crisis_level": None,
+    "inferred_turn_intent": "",
+    "final_response": ""
+}
+
+# Helper functions for data loading
+USER_DATA_PATH = "./data/User_Data.csv"
+LTM_DATA_PATH = "./data/LTM_Data.csv"
+
+def file_mtime(path):
+    """Modification time used as a cache key (None if the file is missing)"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+# The cached loaders raise instead of returning an empty result: st.cache_data does not
+# store exceptions, so a failed read is retried on the next call rather than cached for the TTL
+
+class _UncachedResult(Exception):
+    pass
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_user_table(user_data_mtime):
+    # Indexed by user_id for direct row lookups (the column is kept as well)
+    return pd.read_csv(USER_DATA_PATH, dtype={"user_id": str}).set_index("user_id", drop=False)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_valid_user_ids(user_data_mtime):
+    user_ids = get_valid_user_ids()
+    if not user_ids:
+        raise _UncachedResult()
+    return user_ids
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_user_profile(user_id, user_data_mtime, ltm_mtime):
+    user_context = get_user_profile(user_id)
+    if user_context is None:
+        raise _UncachedResult()
+    return user_context
+
+def load_user_table():
+    """User_Data.csv as a DataFrame, re-read only when the file changes"""
+    return _cached_user_table(file_mtime(USER_DATA_PATH))
+
+def load_valid_user_ids():
+    """Valid user IDs, re-read only when User_Data.csv changes (empty list if unavailable)"""
+    try:
+        return _cached_valid_user_ids(file_mtime(USER_DATA_PATH))
+    except _UncachedResult:
+        return []
+
+def load_user_profile(user_id):
+    """User profile and LTM context, re-read only when User_Data.csv or LTM_Data.csv changes (None if unavailable)"""
+    try:
+        return _cached_user_profile(user_id, file_mtime(USER_DATA_PATH), file_mtime(LTM_DATA_PATH))
+    except _UncachedResult:
+        return None
+
+# ========== PAGE CONFIG ==========
+st.set_page_config(
+    page_title="Anaya | Farm Wellness Assistant",
+    page_icon="🌾",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# ========== CUSTOM CSS ==========
+_CSS_SOURCE = """
+<style>
+    /* Main background */
+    .main {
+        background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%);
+    }
+    
+    /* Header styling */
+    .main-header {
+        background: linear-gradient(90deg, #2e7d32 0%, #388e3c 100%);
+        padding: 30px;
+        border-radius: 15px;
+        margin-bottom: 30px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+    }
+    
+    .main-header h1 {
+        color: white;
+        margin: 0;
+        font-size: 2.5rem;
+        font-weight: 700;
+    }
+    
+    .main-header p {
+        color: #c8e6c9;
+        margin: 10px 0 0 0;
+        font-size: 1.1rem;
+    }
+    
+    /* Chat container */
+    .chat-container {
+        background: white;
+        border-radius: 15px;
+        padding: 25px;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        margin-bottom: 20px;
+    }
+    
+    /* User message bubble */
+    .user-message {
+        background: linear-gradient(135deg, #4caf50 0%, #66bb6a 100%);
+        color: white;
+        padding: 15px 20px;
+        border-radius: 20px 20px 5px 20px;
+        margin: 10px 0;
+        max-width: 80%;
+        float: right;
+        clear: both;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+    }
+    
+    /* Assistant message bubble */
+    .assistant-message {
+        background: #f5f5f5;
+        color: #333;
+        padding: 15px 20px;
+        border-radius: 20px 20px 20px 5px;
+        margin: 10px 0;
+        max-width: 80%;
+        float: left;
+        clear: both;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+    }
+    
+    /* Sidebar styling */
+    .sidebar .sidebar-content {
+        background: linear-gradient(180deg, #1b5e20 0%, #2e7d32 100%);
+    }
+    
+    /* Input box */
+    .stTextInput input {
+        border-radius: 25px;
+        border: 2px solid #4caf50;
+        padding: 12px 20px;
+    }
+    
+    /* Buttons */
+    .stButton button {
+        border-radius: 25px;
+        background: linear-gradient(90deg, #4caf50 0%, #66bb6a 100%);
+        color: white;
+        font-weight: 600;
+        border: none;
+        padding: 12px 30px;
+        transition: all 0.3s ease;
+    }
+    
+    .stButton button:hover {
+        background: linear-gradient(90deg, #388e3c 0%, #4caf50 100%);
+        box-shadow: 0 4px 12px rgba(76,175,80,0.4);
+    }
+    
+    /* Crisis alert */
+    .crisis-alert {
+        background-color: #ffebee;
+        border-left: 5px solid #f44336;
+        padding: 15px;
+        border-radius: 5px;
+        margin: 10px 0;
+    }
+</style>
+"""
+
+# Streamlit re-sends every element on each rerun (an element produced inside a cached
+# function is replayed too), so instead of caching the injection, shrink the payload
+# once at import: comments and indentation are stripped.
+_CSS = re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", _CSS_SOURCE, flags=re.S)).strip()
+
+def inject_css():
+    """Apply the custom styles (must run on every rerun)"""
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+# ========== SESSION STATE INITIALIZATION ==========
+# Default for every session key; callables are called so each session gets
+# fresh values (ids, clocks and mutable containers are never shared)
+_SESSION_DEFAULTS = {
+    "logged_in": False,
+    "user_id": None,
+    "user_context": None,
+    "initial_user_context": None,
+    "session_id": lambda: str(uuid.uuid4()),
+    "session_started_at": datetime.now,
+    "session_started_clock": monotonic,
+    "messages": list,
+    "conversation_history": list,
+    "chat_history_str": "",
+    "conversation_started": False,
+    "message_count": 0,
+    "final_state": dict,
+    "completed_intents": list,
+    "session_primary_skill": ""
+}
+
+def init_session_state():
+    """Initialize session state variables"""
+    for key, default in _SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default() if callable(default) else default
+
+def append_history_line(line):
+    """Add a line to the conversation history and to the running transcript passed to the workflow"""
+    st.session_state.conversation_history.append(line)
+    if st.session_state.chat_history_str:
+        st.session_state.chat_history_str += "\n"
+    st.session_state.chat_history_str += line
+
+# ========== LTM SAVE HELPER ==========
+def save_ltm_on_session_end():
+    """Save LTM when session ends (logout or new conversation)"""
+    if st.session_state.message_count > 0:
+        from core.event_ingestion import flush_stm_events, build_ltm_event, append_ltm_event
+        
+        # Make sure this session's STM rows are on disk before it ends
+        try:
+            flush_stm_events(st.session_state.session_id)
+        except Exception:
+            logger.exception("Error saving STM rows for session %s", st.session_state.session_id)
+            # A toast, unlike st.warning, is still shown after the rerun that follows a session end
+            st.toast("Some messages from this session could not be saved to the activity log.", icon="⚠️")
+        
+        try:
+            # Final state (what was updated during conversation)
+            final_state = st.session_state.final_state
+            
+            # Initial state (from User_Data.csv when user logged in)
+            initial_context = st.session_state.initial_user_context or {}
+            
+            ltm_event = build_ltm_event(
+                final_state=final_state,
+                initial_journey_list=initial_context.get('user_journey', []),
+                initial_toolkit=initial_context.get('personal_toolkit', {}),
+                initial_intentions=initial_context.get('guiding_intentions', []),
+                initial_threads=initial_context.get('memory_threads', {}),
+                conversation_history=st.session_state.conversation_history,
+                user_id=st.session_state.user_id,
+                session_id=st.session_state.session_id,
+                session_started_at=st.session_state.session_started_at
+            )
+            
+            # Only this session's row is written; earlier sessions stay untouched
+            append_ltm_event(ltm_event, LTM_DATA_PATH)
+            print(f" LTM saved for session {st.session_state.session_id}")
+            return True
+        except Exception:
+            logger.exception("Error saving LTM for session %s", st.session_state.session_id)
+            return False
+    return False
+
+# ========== LOGIN PAGE ==========
+def show_login_page():
+    """Display login page with CSV user selection"""
+    st.markdown("""
+        <div class="main-header">
+            <h1>🌾 Welcome to Anaya</h1>
+            <p>Your AI Wellness Companion for Farm Life</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("### 👤 Enter Your Details")
+    
+    # Get valid users from CSV
+    valid_users = load_valid_user_ids()
+    
+    if not valid_users:
+        st.error(" No users found in User_Data.csv. Please add users to ./data/User_Data.csv to continue.")
+        st.stop()
+    
+    # User selection (a form, so browsing the list does not rerun the page until submit)
+    with st.form("login_form"):
+        selected_user = st.selectbox(
+            "Select your User ID:",
+            options=[""] + valid_users,
+            format_func=lambda x: "-- Select a User --" if x == "" else x
+        )
+        
+        # Login button
+        if st.form_submit_button("🌾 Start Session"):
+            if not selected_user:
+                st.error(" Please select a user")
+            elif selected_user in valid_users:
+                # Load user profile
+                user_context = load_user_profile(selected_user)
+                
+                if user_context:
+                    st.session_state.user_id = selected_user
+                    st.session_state.user_context = user_context
+                    # Read-only view of the context at login; per-turn updates rebind user_context
+                    st.session_state.initial_user_context = MappingProxyType(user_context)
+                    st.session_state.logged_in = True
+                    st.session_state.session_id = str(uuid.uuid4())
+                    st.session_state.session_started_at = datetime.now()
+                    st.session_state.session_started_clock = monotonic()
+                    st.rerun()
+                else:
+                    st.error(" Could not load user profile. Please try again.")
+            else:
+                st.error(" Invalid user ID")
+    
+    # Information section
+    st.markdown("---")
+    st.markdown("### 🌾 About Anaya")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        **What Anaya Offers:**
+        - 💚 Emotional support and validation
+        - 🧠 Practical coping strategies  
+        - 🌾 Farm-specific wellness guidance
+        - 🗣️ Compassionate, judgment-free space
+        """)
+    
+    with col2:
+        st.markdown("""
+        **How It Works:**
+        1. Select your user profile
+        2. Share what's on your mind
+        3. Get personalized support
+        4. Build your wellness journey
+        """)
+    
+    st.markdown("---")
+    
+    # Disclaimer
+    with st.expander("⚠️ Important Notice"):
+        st.markdown("""
+        Anaya provides **emotional support and wellness guidance** 
+        but is **NOT a substitute** for professional medical care, 
+        therapy, or crisis intervention.
+        
+        **Always consult qualified healthcare professionals** 
+        for diagnosis, treatment, or emergencies.
+        
+        **Crisis Resources (Canada):**
+        - Crisis Text Line: Text HOME to 741741
+        - National Suicide Prevention: Call or text 988
+        - Talk Suicide Canada: 1-833-456-4566
+        - Emergency: Call 911
+        """)
+    
+    st.markdown("---")
+    st.markdown("_Built with ❤️ for Canadian Farmers_")
+    st.markdown("_Version 1.0_")
+
+# ========== SIDEBAR ==========
+def render_sidebar():
+    """Render sidebar with session info and controls"""
+    with st.sidebar:
+        st.markdown("## 🌾 Anaya AI")
+        st.markdown("---")
+        
+        # User info
+        if st.session_state.user_context:
+            st.success(f"**Logged in as:**")
+            st.markdown(f"👤 **{st.session_state.user_context['user_name']}**")
+            st.markdown(f"🆔 `{st.session_state.user_id}`")
+            
+            # User info for the logged-in user
+            try:
+                user_info = load_user_table().loc[st.session_state.user_id]
+                
+                st.info(f"""
+                **Name:** {user_info['first_name']} {user_info['last_name']}  
+                **Location:** {user_info['city']}, {user_info['province']}  
+                **Profile:** {user_info['user_profile']}
+                """)
+            except Exception as e:
+                st.error(f"Error loading user info: {e}")
+        
+        st.markdown("---")
+        
+        # Session info
+        st.markdown("### 📊 Session Info")
+        
+        if st.session_state.session_started_clock:
+            minutes, _ = divmod(int(monotonic() - st.session_state.session_started_clock), 60)
+            st.markdown(f"**Duration:** {minutes} min")
+        
+        st.markdown(f"**Messages:** {st.session_state.message_count}")
+        st.markdown(f"**Session ID:** `{st.session_state.session_id[:8]}...`")
+        
+        st.markdown("---")
+        
+        # Session controls
+        st.markdown("### ⚙️ Session Controls")
+        
+        if st.button("🔄 New Conversation", use_container_width=True):
+            # Save LTM before clearing
+            save_ltm_on_session_end()
+            
+            # Reset conversation state
+            st.session_state.messages = []
+            st.session_state.conversation_history = []
+            st.session_state.chat_history_str = ""
+            st.session_state.conversation_started = False
+            st.session_state.message_count = 0
+            st.session_state.session_id = str(uuid.uuid4())
+            st.session_state.session_started_at = datetime.now()
+            st.session_state.session_started_clock = monotonic()
+            st.session_state.completed_intents = []
+            st.session_state.session_primary_skill = ""
+            
+            # Reload user context
+            st.session_state.user_context = load_user_profile(st.session_state.user_id)
+            st.session_state.initial_user_context = MappingProxyType(st.session_state.user_context)
+            
+            st.rerun()
+        
+        if st.button("🚪 Logout", use_container_width=True):
+            # Save LTM before logout
+            save_ltm_on_session_end()
+            
+            # Clear all session state
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            
+            st.rerun()
+        
+        st.markdown("---")
+        
+        # User profile summary
+        st.markdown("### 📋 Your Profile")
+        
+        if st.session_state.user_context:
+            with st.expander("View Details"):
+                st.markdown(f"**Profile:**")
+                st.markdown(st.session_state.user_context['user_profile'])
+                
+                if st.session_state.user_context.get('user_journey'):
+                    st.markdown(f"**Journey Entries:** {len(st.session_state.user_context['user_journey'])}")
+                
+                if st.session_state.user_context.get('guiding_intentions'):
+                    intentions = [i for i in st.session_state.user_context['guiding_intentions'] if i]
+                    st.markdown(f"**Guiding Intentions:** {len(intentions)}")
+                
+                toolkit = st.session_state.user_context.get('personal_toolkit', {})
+                helpful = len(toolkit.get('user_found_helpful', []))
+                st.markdown(f"**Helpful Tools:** {helpful}")
+        
+        st.markdown("---")
+        
+        # Disclaimer
+        with st.expander("⚠️ Important Notice"):
+            st.markdown("""
+            Anaya provides **emotional support and wellness guidance** 
+            but is **NOT a substitute** for professional medical care, 
+            therapy, or crisis intervention.
+            
+            **Always consult qualified healthcare professionals** 
+            for diagnosis, treatment, or emergencies.
+            """)
+        
+        st.markdown("---")
+        st.markdown("_Built for Canadian Farmers_")
+        st.markdown("_Version 1.0_")
+
+# ========== CHAT INTERFACE ==========
+def crisis_alert_html(crisis_level):
+    """Alert shown under a reply to a detected crisis"""
+    level = "Unknown" if crisis_level is None else html.escape(str(crisis_level))
+    # Kept at column 0 with no blank lines: indented lines would render as a markdown code block
+    return (
+        '<div class="crisis-alert">\n'
+        '<strong> Crisis Alert Detected</strong><br>\n'
+        f'Level: {level}\n'
+        '</div>'
+    )
+
+def render_message(msg):
+    """Render one chat message (the crisis alert HTML is built once, when the reply is produced)"""
+    with st.chat_message(msg["role"], avatar="🌱" if msg["role"] == "assistant" else "👤"):
+        st.markdown(msg["content"])
+        if "timestamp" in msg:
+            st.caption(msg["timestamp"])
+        
+        # Show crisis alert if detected
+        if "crisis_html" in msg:
+            st.markdown(msg["crisis_html"], unsafe_allow_html=True)
+
+def commit_chat_turn(user_msg, turn_state, result, failure_reply):
+    """
+    Record a chat turn in session state and the STM log in one step: the user message, the
+    reply (or `failure_reply` when the workflow produced no `result`) and the updated context
+    """
+    from core.event_ingestion import build_stm_event, enqueue_stm_event
+    
+    # Bind session state used throughout the turn once
+    messages = st.session_state.messages
+    user_context = st.session_state.user_context
+    completed_intents = st.session_state.completed_intents
+    primary_skill = st.session_state.session_primary_skill
+    
+    messages.append(user_msg)
+    append_history_line(f"User: {user_msg['content']}")
+    
+    # Session-state changes for this turn, applied together at the end
+    pending = {}
+    
+    if result is not None:
+        response = result.get("final_response", "I'm sorry, I encountered an issue.")
+        
+        # Add agent log
+        agent_log = {
+            "pipeline": "Success",
+            "focus_emotion": result.get("focus_emotion", "N/A"),
+            "session_topic": result.get("session_topic", "N/A"),
+            "session_mood": result.get("session_mood", "N/A"),
+            "crisis_flag": result.get("crisis_flag", False),
+            "crisis_level": result.get("crisis_level", None)
+        }
+        
+        pending["final_state"] = result  # Store for LTM logging later
+        pending["message_count"] = st.session_state.message_count + 1
+        
+        # Update completed intents
+        if result.get("inferred_turn_intent"):
+            completed_intents.append(result["inferred_turn_intent"])
+        
+        # Update session primary skill
+        if result.get("frequent_agents"):
+            primary_skill = result["frequent_agents"][0]
+        pending["session_primary_skill"] = primary_skill
+        
+        # Update user context with new LTM state (a new dict, so the
+        # initial_user_context snapshot of the previous one stays unchanged)
+        pending["user_context"] = {
+            **user_context,
+            'user_journey': result.get('user_journey', user_context['user_journey']),
+            'personal_toolkit': result.get('personal_toolkit', user_context['personal_toolkit']),
+            'guiding_intentions': result.get('guiding_intentions', user_context['guiding_intentions']),
+            'memory_threads': result.get('memory_thread', user_context['memory_threads'])
+        }
+    else:
+        response = failure_reply
+        
+        # Empty log for failed responses
+        agent_log = {
+            "pipeline": "Error occurred",
+            "focus_emotion": "N/A",
+            "session_topic": "N/A",
+            "session_mood": "N/A",
+            "crisis_flag": False,
+            "crisis_level": None
+        }
+    
+    # Display response
+    assistant_msg = {
+        "role": "assistant",
+        "content": response,
+        "timestamp": user_msg["timestamp"],
+        "agent_log": agent_log
+    }
+    if agent_log["crisis_flag"]:
+        assistant_msg["crisis_html"] = crisis_alert_html(agent_log["crisis_level"])
+    messages.append(assistant_msg)
+    
+    # Update conversation history with response only
+    if result is not None:
+        append_history_line(f"Anaya: {response}")
+    
+    # Save to STM (this turn's row is appended by the background writer). A turn without
+    # a result is logged from its input state, which has no plan, so it records as FAILURE.
+    stm_event = build_stm_event(
+        result if result is not None else turn_state,
+        st.session_state.user_id,
+        st.session_state.session_id,
+        completed_intents,
+        primary_skill
+    )
+    enqueue_stm_event(stm_event)
+    
+    st.session_state.update(pending)
+
+def render_chat_interface():
+    """Main chat interface"""
+    
+    # Check API key
+    if not os.getenv("GOOGLE_API_KEY"):
+        st.error(" **Error:** GOOGLE_API_KEY not found. Please add it to your .env file.")
+        st.stop()
+    
+    # Header
+    st.markdown("""
+    <div class="main-header">
+        <h1>🌾 Chat with Anaya</h1>
+        <p>Share what's on your mind - I'm here to listen and support you</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Chat container
+    chat_container = st.container()
+    
+    with chat_container:
+        # Welcome message (only show once)
+        if not st.session_state.conversation_started:
+            with st.chat_message("assistant", avatar="🌱"):
+                st.markdown(f"""
+                **Hi {st.session_state.user_context['user_name']}! I'm Anaya, your wellness companion.**
+                
+                I'm here to provide:
+                - 💚 Emotional support and validation
+                - 🧠 Practical coping strategies
+                - 🌾 Farm-specific wellness guidance
+                - 🗣️ A compassionate, judgment-free space
+                
+                **How are you feeling today?**
+                """)
+            st.session_state.conversation_started = True
+        
+        # Display conversation history
+        for msg in st.session_state.messages:
+            render_message(msg)
+    
+    # Chat input
+    if prompt := st.chat_input("Type your message here...", key="user_input"):
+        # One timestamp for the whole turn
+        turn_time = datetime.now().strftime("%I:%M %p")
+        user_context = st.session_state.user_context
+        
+        user_msg = {
+            "role": "user",
+            "content": prompt,
+            "timestamp": turn_time
+        }
+        
+        # Show the user message right away and answer it in this same run
+        with chat_container:
+            render_message(user_msg)
+        
+        # The workflow sees the transcript including this message
+        user_line = f"User: {prompt}"
+        chat_history = st.session_state.chat_history_str
+        chat_history = f"{chat_history}\n{user_line}" if chat_history else user_line
+        
+        # Prepare state for workflow
+        turn_state = _TURN_STATE_TEMPLATE.copy()
+        turn_state.update(
+            user_id=st.session_state.user_id,
+            user_message=prompt,
+            chat_history=chat_history,
+            user_name=user_context['user_name'],
+            user_profile=user_context['user_profile'],
+            guiding_intentions=user_context['guiding_intentions'],
+            user_journey=user_context['user_journey'],
+            memory_thread=user_context['memory_threads'],
+            personal_toolkit=user_context['personal_toolkit'],
+            execution_plan=[],
+            completed_steps=[],
+            completed_intents_in_flow=st.session_state.completed_intents,
+            session_primary_skill=st.session_state.session_primary_skill,
+            frequent_agents=[]
+        )
+        
+        # Session state is only written by commit_chat_turn in the finally block. A click or new
+        # message mid-turn makes the next st.* call raise Streamlit's RerunException (a
+        # BaseException, so `except Exception` lets it through); the turn is still recorded.
+        result = None
+        failure_reply = "I was interrupted before I could finish replying. Please send your message again."
+        with st.status("🌾 Anaya is thinking...") as status:
+            try:
+                # Run workflow, reporting progress as each node finishes
+                streamed = turn_state
+                for mode, chunk in get_app().stream(turn_state, stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        streamed = chunk
+                        continue
+                    
+                    for node, update in chunk.items():
+                        status.update(label=WORKFLOW_STEP_LABELS.get(node, "🌾 Anaya is thinking..."))
+                        if node == "short_term_memory" and update:
+                            st.caption(f"Mood: {update.get('session_mood', 'N/A')} · Focus: {update.get('focus_emotion', 'N/A')}")
+                result = streamed
+                
+            except Exception as e:
+                failure_reply = "I apologize, but I encountered an error. Please try again."
+                logger.exception("Chat turn failed")
+                st.error(f" Error: {str(e)}")
+                if DEBUG_MODE:
+                    st.code(traceback.format_exc())
+            
+            finally:
+                commit_chat_turn(user_msg, turn_state, result, failure_reply)
+        
+        # Rerun once so the reply and the sidebar counters are redrawn
+        st.rerun()
+
+# ========== MAIN APP ==========
+def main():
+    """Main application entry point"""
+    inject_css()
+    init_session_state()
+    
+    if not st.session_state.logged_in:
+        show_login_page()
+    else:
+        render_sidebar()
+        render_chat_interface()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
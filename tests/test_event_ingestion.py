@@ -0,0 +1,92 @@
+"""
+Checks for the CSV event writers in core.event_ingestion.
+"""
+
+import csv
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pydantic")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import event_ingestion
+from core.utils import STM_COLUMNS
+
+
+def stm_row(session_id=None, **values):
+    row = {column: f"{column}-value" for column in STM_COLUMNS}
+    row["session_id"] = session_id or str(uuid.uuid4())
+    row.update(values)
+    return row
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def test_header_is_written_to_an_empty_file(tmp_path):
+    path = tmp_path / "stm.csv"
+    path.touch()
+
+    event_ingestion.append_stm_event(stm_row(user_message="héllo"), str(path))
+
+    header, rows = read_csv(path)
+    assert header == STM_COLUMNS
+    assert len(rows) == 1
+    assert rows[0]["user_message"] == "héllo"
+
+
+def test_rows_follow_the_existing_header_order(tmp_path):
+    path = tmp_path / "stm.csv"
+    reordered = list(reversed(STM_COLUMNS))
+    path.write_text(",".join(reordered) + "\n", encoding="utf-8")
+
+    row = stm_row()
+    event_ingestion.append_stm_event(row, str(path))
+
+    header, rows = read_csv(path)
+    assert header == reordered
+    assert rows == [{column: str(row[column]) for column in reordered}]
+
+
+def test_column_mismatch_raises(tmp_path):
+    path = tmp_path / "stm.csv"
+    path.write_text("event_id,timestamp\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        event_ingestion.append_stm_event(stm_row(), str(path))
+
+    assert path.read_text(encoding="utf-8") == "event_id,timestamp\n"
+
+
+def test_flush_retries_failed_rows_for_its_own_session(tmp_path):
+    path = tmp_path / "stm.csv"
+    other_path = tmp_path / "other.csv"
+    # A header the writer rejects, so the queued row fails until the file is fixed
+    path.write_text("event_id,timestamp\n", encoding="utf-8")
+
+    failing_session, other_session = str(uuid.uuid4()), str(uuid.uuid4())
+    event_ingestion.enqueue_stm_event(stm_row(failing_session), str(path))
+    event_ingestion.enqueue_stm_event(stm_row(other_session), str(other_path))
+
+    # Another session's flush is not affected by the failing row
+    event_ingestion.flush_stm_events(other_session)
+    assert len(read_csv(other_path)[1]) == 1
+
+    with pytest.raises(RuntimeError):
+        event_ingestion.flush_stm_events(failing_session)
+
+    # The row is kept and written by the next flush once the file is usable
+    path.unlink()
+    event_ingestion.flush_stm_events(failing_session)
+
+    header, rows = read_csv(path)
+    assert header == STM_COLUMNS
+    assert [row["session_id"] for row in rows] == [failing_session]
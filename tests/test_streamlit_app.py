@@ -0,0 +1,41 @@
+"""
+Render checks for the Streamlit UI helpers.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pandas")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import streamlit_app
+
+
+def test_crisis_alert_is_a_single_unindented_html_block():
+    alert = streamlit_app.crisis_alert_html("High")
+
+    lines = alert.splitlines()
+    assert lines[0] == '<div class="crisis-alert">'
+    assert lines[-1] == "</div>"
+    # Markdown turns a line indented by 4+ spaces into a code block and ends an HTML block at a blank line
+    assert all(line == line.lstrip() for line in lines)
+    assert all(line.strip() for line in lines)
+    assert "Level: High" in alert
+
+
+def test_crisis_alert_escapes_level_and_defaults_to_unknown():
+    assert "Level: Unknown" in streamlit_app.crisis_alert_html(None)
+    assert "<script>" not in streamlit_app.crisis_alert_html("<script>")
+
+
+def test_crisis_alert_renders_as_html_not_code():
+    markdown = pytest.importorskip("markdown")
+
+    rendered = markdown.markdown(streamlit_app.crisis_alert_html("High"))
+
+    assert "<code>" not in rendered
+    assert '<div class="crisis-alert">' in rendered